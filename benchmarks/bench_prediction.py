@@ -0,0 +1,64 @@
+"""
+Prediction benchmarks: single-report latency and batch throughput
+"""
+
+import dataclasses
+
+import pytest
+
+from priority_module import CompiledPriorityModel
+
+
+@pytest.fixture
+def uncached(priority_app, monkeypatch):
+    """Disable the prediction cache so every call reaches the model"""
+    monkeypatch.setattr(priority_app.prediction_cache, 'max_entries', 0)
+    priority_app.prediction_cache.clear()
+    return priority_app
+
+
+@pytest.fixture
+def compiled_mode(priority_app, monkeypatch):
+    """Serve the trained forest from its compiled lookup table"""
+    snapshot = priority_app.model_registry.current
+    compiled = CompiledPriorityModel.from_forest(snapshot.model, snapshot.encoder)
+    monkeypatch.setattr(priority_app.model_registry, '_snapshot', dataclasses.replace(snapshot, compiled=compiled))
+    return priority_app
+
+
+def bench_predict_priority_forest(benchmark, uncached, sample_reports):
+    report = sample_reports[0]
+    result = benchmark(uncached.predict_priority, report)
+    assert result[1] in uncached.PRIORITY_LEVELS.values()
+
+
+def bench_predict_priority_cached(benchmark, priority_app, sample_reports):
+    report = sample_reports[0]
+    priority_app.predict_priority(report)
+    benchmark(priority_app.predict_priority, report)
+
+
+def bench_predict_priority_compiled(benchmark, compiled_mode, sample_reports):
+    benchmark(compiled_mode.predict_priority, sample_reports[0])
+
+
+@pytest.mark.parametrize('batch_size', [100, 1000, 10_000])
+def bench_predict_priorities_forest(benchmark, priority_app, sample_reports, batch_size):
+    reports = sample_reports[:batch_size]
+    benchmark.extra_info['batch_size'] = batch_size
+    results = benchmark(priority_app.predict_priorities, reports)
+    assert len(results) == batch_size
+
+
+@pytest.mark.parametrize('batch_size', [1000, 10_000])
+def bench_predict_priorities_compiled(benchmark, compiled_mode, sample_reports, batch_size):
+    reports = sample_reports[:batch_size]
+    benchmark.extra_info['batch_size'] = batch_size
+    benchmark(compiled_mode.predict_priorities, reports)
+
+
+@pytest.mark.parametrize('batch_size', [1000, 10_000])
+def bench_predict_priorities_rules(benchmark, priority_app, sample_reports, batch_size):
+    reports = sample_reports[:batch_size]
+    benchmark.extra_info['batch_size'] = batch_size
+    benchmark(priority_app.predict_priorities, reports, use_rules=True)
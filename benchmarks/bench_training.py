@@ -0,0 +1,22 @@
+"""
+Dataset generation and training benchmarks
+"""
+
+import pytest
+
+
+@pytest.mark.parametrize('rows', [10_000, 1_000_000])
+def bench_create_synthetic_dataset(benchmark, priority_app, rows):
+    benchmark.extra_info['rows'] = rows
+    df = benchmark(priority_app.create_synthetic_dataset, rows, seed=0)
+    assert len(df) == rows
+
+
+@pytest.mark.parametrize('rows', [1000, 10_000, 50_000])
+def bench_fit_priority_model(benchmark, priority_app, rows):
+    df = priority_app.create_synthetic_dataset(rows, seed=0)
+    benchmark.extra_info['rows'] = rows
+    model, feature_columns, metrics, _ = benchmark.pedantic(
+        priority_app.fit_priority_model, args=(df, lambda stage, fraction: None), rounds=3, iterations=1
+    )
+    benchmark.extra_info['accuracy'] = metrics['accuracy']
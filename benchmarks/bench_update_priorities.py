@@ -0,0 +1,27 @@
+"""
+update_report_priorities against the in-memory report table
+"""
+
+import pytest
+
+from conftest import InMemoryReportTable
+
+
+@pytest.mark.parametrize('chunk_size', [100, 500])
+def bench_update_report_priorities_full(benchmark, priority_app, sample_reports, monkeypatch, chunk_size):
+    def fresh_table():
+        monkeypatch.setattr(priority_app, 'supabase', InMemoryReportTable(sample_reports))
+        return (), {'chunk_size': chunk_size, 'full': True}
+
+    benchmark.extra_info['reports'] = len(sample_reports)
+    updated = benchmark.pedantic(priority_app.update_report_priorities, setup=fresh_table, rounds=5)
+    assert updated == len(sample_reports)
+
+
+def bench_update_report_priorities_unchanged(benchmark, priority_app, report_table):
+    # Everything already scored: a full pass reads every page but writes nothing
+    priority_app.update_report_priorities(full=True)
+    report_table.updated = 0
+    benchmark.extra_info['reports'] = len(report_table.rows)
+    benchmark(priority_app.update_report_priorities, full=True)
+    assert report_table.updated == 0
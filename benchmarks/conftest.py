@@ -0,0 +1,132 @@
+"""
+Shared fixtures for the priority service benchmarks
+app.py is imported against throwaway state directories and an in-memory
+stand-in for the Supabase ``report`` table, so no network is touched
+"""
+
+import bisect
+import copy
+import os
+import sys
+import tempfile
+
+import pytest
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+# Keep the benchmark model, job records, refresh state and metrics out of the repository
+_STATE_DIR = tempfile.mkdtemp(prefix='priority-bench-')
+os.environ['PRIORITY_MODEL_DIR'] = os.path.join(_STATE_DIR, 'models')
+os.environ['PRIORITY_JOB_DIR'] = os.path.join(_STATE_DIR, 'training_jobs')
+os.environ['PRIORITY_UPDATE_STATE'] = os.path.join(_STATE_DIR, 'priority_update_state.json')
+os.environ['PRIORITY_METRICS_PATH'] = os.path.join(_STATE_DIR, 'model_metrics.txt')
+
+import app  # noqa: E402  (needs the environment above)
+from priority_module.synthetic import generate_synthetic_reports  # noqa: E402
+
+TRAINING_ROWS = 5000
+
+
+class _Response:
+    def __init__(self, data):
+        self.data = data
+
+
+class _Query:
+    """The slice of the PostgREST query builder app.py uses"""
+
+    def __init__(self, table):
+        self.table = table
+        self.columns = None
+        self.after_id = None
+        self.page_size = None
+        self.ids = None
+        self.values = None
+
+    def select(self, *columns):
+        self.columns = columns
+        return self
+
+    def gt(self, column, value):
+        assert column == 'id'
+        self.after_id = value
+        return self
+
+    def in_(self, column, values):
+        assert column == 'id'
+        self.ids = values
+        return self
+
+    def order(self, column):
+        assert column == 'id'
+        return self
+
+    def limit(self, count):
+        self.page_size = count
+        return self
+
+    def update(self, values):
+        self.values = values
+        return self
+
+    def execute(self):
+        if self.values is not None:
+            return _Response(self.table.update(self.values, self.ids))
+        return _Response(self.table.select(self.columns, self.after_id, self.page_size))
+
+
+class InMemoryReportTable:
+    """
+    Supabase stand-in holding the ``report`` table in id order
+
+    Keyset pages are found with bisect, so the benchmarks measure app.py
+    rather than the stand-in.
+    """
+
+    def __init__(self, rows):
+        self.rows = sorted((copy.deepcopy(row) for row in rows), key=lambda row: row['id'])
+        self.ids = [row['id'] for row in self.rows]
+        self.by_id = {row['id']: row for row in self.rows}
+        self.updated = 0
+
+    def table(self, name):
+        assert name == 'report'
+        return _Query(self)
+
+    def select(self, columns, after_id, page_size):
+        start = bisect.bisect_right(self.ids, after_id if after_id is not None else float('-inf'))
+        end = len(self.rows) if page_size is None else start + page_size
+        return [{column: row.get(column) for column in columns} for row in self.rows[start:end]]
+
+    def update(self, values, ids):
+        rows = [self.by_id[id] for id in ids if id in self.by_id]
+        for row in rows:
+            row.update(values)
+        self.updated += len(rows)
+        return [dict(row) for row in rows]
+
+
+@pytest.fixture(scope='session')
+def priority_app():
+    """app.py serving a forest trained on seeded synthetic data"""
+    df = app.create_synthetic_dataset(TRAINING_ROWS, seed=42)
+    model, feature_columns, metrics, report = app.fit_priority_model(df, lambda stage, fraction: None)
+    app.save_priority_model(model, feature_columns, metrics, report, lambda stage, fraction: None)
+    return app
+
+
+@pytest.fixture(scope='session')
+def sample_reports():
+    """10,000 report dictionaries with the five categorical fields"""
+    df = generate_synthetic_reports(10_000, seed=7)
+    fields = list(app.FEATURE_FIELDS)
+    return df[['id'] + fields].astype({field: str for field in fields}).to_dict('records')
+
+
+@pytest.fixture
+def report_table(monkeypatch, sample_reports):
+    """Fresh in-memory report table patched in as app.supabase"""
+    table = InMemoryReportTable(sample_reports)
+    monkeypatch.setattr(app, 'supabase', table)
+    return table
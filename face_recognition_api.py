@@ -29,6 +29,7 @@ from face_recognition_module import (
     GPUMonitor,
     DatabaseManager
 )
+from face_recognition_module.core.face_recognizer_supabase import MAX_TOP_K
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -44,7 +45,9 @@ async def lifespan(app: FastAPI):
     """Initialize and cleanup the face recognition system"""
     global face_recognizer
     try:
-        face_recognizer = FaceRecognizerWithSupabase(similarity_threshold=0.4)
+        # FACE_INDEX=ivf switches to approximate search for very large galleries
+        face_recognizer = FaceRecognizerWithSupabase(similarity_threshold=0.4,
+                                                     index=os.getenv("FACE_INDEX", "exact"))
         
         # Check GPU status
         gpu_status = gpu_monitor.get_gpu_status()
@@ -197,8 +200,10 @@ async def train_student(
         if not image_data_list:
             raise HTTPException(status_code=400, detail="No valid images could be processed")
         
-        # Train the face recognition system
-        result = await face_recognizer.train_person(student_info, image_data_list)
+        # Train the face recognition system (new images are added to the
+        # student's existing templates unless "replace" is set)
+        result = await face_recognizer.train_person(student_info, image_data_list,
+                                                    append=not student_info.get('replace', False))
         
         if result['success']:
             logger.info(f"✅ Student trained successfully: {student_info.get('name')}")
@@ -231,6 +236,9 @@ async def mass_face_recognition(
     
     Args:
         attendance_data: JSON string with attendance session information
+            (set "global_fallback": true to also identify faces that are
+            not in the class roster, and "top_k": n to get each face's n
+            closest students for manual review, at most 20)
         class_photo: Uploaded class photo for recognition
     """
     try:
@@ -259,10 +267,33 @@ async def mass_face_recognition(
         if enhanced_image is None:
             raise HTTPException(status_code=400, detail="Could not process the uploaded image")
         
-        # Perform mass recognition with annotated image
+        # Get class students from database
+        try:
+            class_response = supabase.table('student_records').select('*').eq('class_id', attendance_info.get('class_id')).execute()
+            class_students = class_response.data or []
+        except Exception as e:
+            logger.error(f"❌ Error fetching class students: {str(e)}")
+            class_students = []
+        
+        roster = {s.get('user_id'): s for s in class_students if s.get('user_id')}
+        
+        # Candidates per face for manual review; anything but a small
+        # non-negative integer is clamped (or ignored if not a number)
+        try:
+            top_k = max(0, min(int(attendance_info.get('top_k') or 0), MAX_TOP_K))
+        except (TypeError, ValueError):
+            top_k = 0
+        
+        # Perform mass recognition with annotated image, matching faces only
+        # against the class roster (optionally falling back to everyone
+        # enrolled, so students from other classes are still labelled)
         recognition_results = await face_recognizer.recognize_faces(
             enhanced_image, 
-            return_annotated_image=True
+            return_annotated_image=True,
+            candidate_student_ids=list(roster) or None,
+            fallback_to_global=bool(attendance_info.get('global_fallback', False)),
+            assignment='hungarian',  # Each student appears at most once in a class photo
+            top_k=top_k
         )
         
         if not recognition_results['success']:
@@ -270,14 +301,6 @@ async def mass_face_recognition(
         
         detected_faces = recognition_results.get('recognition_results', [])
         
-        # Get class students from database
-        try:
-            class_response = supabase.table('student_records').select('*').eq('class_id', attendance_info.get('class_id')).execute()
-            class_students = class_response.data or []
-        except Exception as e:
-            logger.error(f"❌ Error fetching class students: {str(e)}")
-            class_students = []
-        
         # Match recognized faces with class students
         attendance_results = []
         recognized_student_ids = set()
@@ -286,7 +309,7 @@ async def mass_face_recognition(
             student_id = face_data.get('student_id')
             if student_id:
                 # Find student in class roster
-                student = next((s for s in class_students if s.get('user_id') == student_id), None)
+                student = roster.get(student_id)
                 if student:
                     attendance_results.append({
                         "student_id": student_id,
@@ -351,7 +374,17 @@ async def mass_face_recognition(
                 "identified": statistics.get('identified', 0),
                 "unidentified": statistics.get('not_identified', 0)
             },
-            "processing_time_ms": recognition_results.get('recognition_time_ms', 0)
+            "processing_time_ms": recognition_results.get('recognition_time_ms', 0),
+            "face_candidates": [
+                {
+                    "face_id": face_data.get('face_id'),
+                    "bbox": face_data.get('bbox'),
+                    "student_id": face_data.get('student_id'),
+                    "margin": face_data.get('margin'),
+                    "candidates": face_data.get('candidates')
+                }
+                for face_data in detected_faces
+            ] if top_k else None
         }
         
     except json.JSONDecodeError:
@@ -484,7 +517,7 @@ async def delete_student_face_data(student_id: str):
             raise HTTPException(status_code=500, detail="Face recognition system not initialized")
         
         # Delete person data
-        result = await face_recognizer.db_manager.delete_person_by_student_id(student_id)
+        result = await face_recognizer.delete_person_by_student_id(student_id)
         
         if result:
             logger.info(f"✅ Deleted face data for student: {student_id}")
@@ -673,7 +706,7 @@ async def delete_class_face_embeddings(class_id: str):
             student_id = student.get('user_id')
             try:
                 # Delete person data from face recognition database
-                result = await face_recognizer.db_manager.delete_person_by_student_id(student_id)
+                result = await face_recognizer.delete_person_by_student_id(student_id)
                 if result:
                     deleted_count += 1
                     deleted_students.append(student_id)
@@ -682,9 +715,6 @@ async def delete_class_face_embeddings(class_id: str):
                 failed_count += 1
                 logger.error(f"❌ Failed to delete face data for student {student_id}: {str(e)}")
         
-        # Refresh the person cache to reflect deletions
-        await face_recognizer._refresh_person_cache()
-        
         logger.info(f"✅ Deleted face embeddings for {deleted_count} students in class {class_id}")
         
         return {
@@ -5,6 +5,10 @@
 from .core.face_encoder import FaceEncoder
 from .core.face_recognizer import FaceRecognizer
 from .core.face_recognizer_supabase import FaceRecognizerWithSupabase
+from .core.embedding_gallery import EmbeddingGallery, GalleryRecord
+from .core.gallery_index import GalleryIndex, ExactIndex, IVFIndex, create_index
+from .core.assignment import assign_one_to_one
+from .core.templates import build_templates, merge_templates
 from .models.person_model import PersonModel
 from .utils.image_processor import ImageProcessor
 from .utils.gpu_monitor import GPUMonitor
@@ -28,6 +32,15 @@ __all__ = [
     'FaceEncoder',
     'FaceRecognizer',           # Original in-memory recognizer
     'FaceRecognizerWithSupabase',  # New Supabase-integrated recognizer
+    'EmbeddingGallery',
+    'GalleryRecord',
+    'GalleryIndex',
+    'ExactIndex',
+    'IVFIndex',
+    'create_index',
+    'assign_one_to_one',
+    'build_templates',
+    'merge_templates',
     'PersonModel',
     'ImageProcessor',
     'GPUMonitor',
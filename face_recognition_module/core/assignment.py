@@ -0,0 +1,81 @@
+"""
+One-to-one Assignment of Faces to Persons
+Makes sure no person is matched to more than one face in the same photo
+
+scipy is optional: without it the Hungarian method falls back to greedy.
+"""
+
+import logging
+
+import numpy as np
+
+try:
+    from scipy.optimize import linear_sum_assignment
+    SCIPY_AVAILABLE = True
+except ImportError:
+    SCIPY_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+ASSIGNMENT_METHODS = ('hungarian', 'greedy')
+
+
+def assign_one_to_one(similarities: np.ndarray, threshold: float,
+                      method: str = 'hungarian') -> np.ndarray:
+    """
+    Match rows (faces) to columns (persons), each used at most once
+
+    Only pairs scoring above ``threshold`` can be matched.
+
+    Args:
+        similarities: (faces x persons) similarity matrix
+        threshold: Minimum similarity for a match
+        method: 'hungarian' maximizes the total similarity of all matches;
+            'greedy' repeatedly takes the highest remaining pair (faster,
+            and the same result unless two faces compete for one person)
+
+    Returns:
+        Column matched to each row, or -1 for unmatched rows
+
+    Raises:
+        ValueError: If the method is unknown
+    """
+    if method not in ASSIGNMENT_METHODS:
+        raise ValueError(f"Unknown assignment method '{method}', expected one of {ASSIGNMENT_METHODS}")
+
+    assignment = np.full(similarities.shape[0], -1, dtype=np.int64)
+    valid = similarities > threshold
+    if not valid.any():
+        return assignment
+
+    if method == 'hungarian' and SCIPY_AVAILABLE:
+        # Solve only over faces and persons that have at least one valid pair.
+        # Invalid pairs weigh 0, the same as leaving both sides unmatched
+        rows = np.flatnonzero(valid.any(axis=1))
+        cols = np.flatnonzero(valid.any(axis=0))
+        sub_valid = valid[np.ix_(rows, cols)]
+        weights = np.where(sub_valid, similarities[np.ix_(rows, cols)], 0.0)
+        matched_rows, matched_cols = linear_sum_assignment(weights, maximize=True)
+        keep = sub_valid[matched_rows, matched_cols]
+        assignment[rows[matched_rows[keep]]] = cols[matched_cols[keep]]
+        return assignment
+
+    return _greedy_assignment(similarities, valid, assignment)
+
+
+def _greedy_assignment(similarities: np.ndarray, valid: np.ndarray, assignment: np.ndarray) -> np.ndarray:
+    """Take valid pairs in descending similarity while both sides are free"""
+    face_indices, person_indices = np.nonzero(valid)
+    order = np.argsort(-similarities[face_indices, person_indices], kind='stable')
+    person_taken = np.zeros(similarities.shape[1], dtype=bool)
+    remaining = min(len(np.unique(face_indices)), len(np.unique(person_indices)))
+
+    for face, person in zip(face_indices[order].tolist(), person_indices[order].tolist()):
+        if assignment[face] >= 0 or person_taken[person]:
+            continue
+        assignment[face] = person
+        person_taken[person] = True
+        remaining -= 1
+        if remaining == 0:
+            break
+    return assignment
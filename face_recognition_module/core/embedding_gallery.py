@@ -0,0 +1,434 @@
+"""
+Embedding Gallery for Face Recognition
+Keeps every enrolled person's face templates in one contiguous float32 block
+with O(1) lookup by person id and student_id
+"""
+
+import logging
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from .gallery_index import ExactIndex, GalleryIndex, top_k
+
+logger = logging.getLogger(__name__)
+
+
+class GalleryRecord:
+    """
+    Identity metadata of one gallery row
+    """
+    __slots__ = ('id', 'name', 'student_id', 'employee_id', 'department', 'role')
+
+    def __init__(self, id: int, name: str, student_id: Optional[str] = None,
+                 employee_id: Optional[str] = None, department: Optional[str] = None,
+                 role: Optional[str] = None):
+        self.id = id
+        self.name = name
+        self.student_id = student_id
+        self.employee_id = employee_id
+        self.department = department
+        self.role = role
+
+    @classmethod
+    def from_person(cls, person) -> 'GalleryRecord':
+        """Create a record from a PersonTable"""
+        return cls(
+            id=person.id,
+            name=person.name,
+            student_id=person.student_id,
+            employee_id=person.employee_id,
+            department=person.department,
+            role=person.role
+        )
+
+    def to_dict(self) -> Dict:
+        """Convert to dictionary for API responses"""
+        return {slot: getattr(self, slot) for slot in self.__slots__}
+
+    def __repr__(self) -> str:
+        return f"GalleryRecord(id={self.id!r}, name={self.name!r}, student_id={self.student_id!r})"
+
+
+class EmbeddingGallery:
+    """
+    Face templates of all enrolled persons for batched matching
+
+    Every stored template lives in one flat (templates x dim) float32 block,
+    so a person costs exactly as many rows as they have templates. Person
+    ``i`` (``records[i]``) owns the contiguous block rows starting at its
+    offset; a query is scored against the whole block with one matrix
+    multiply and reduced to one score per person with a segment max
+    (``np.maximum.reduceat``).
+
+    The block is a preallocated buffer that doubles when full, so adding a
+    person is amortised O(1). Replacing a person's templates with a
+    different number of them, or removing a person, frees their block rows;
+    the block is compacted once freed rows make up a quarter of it. Removing
+    a person moves the last person into the freed row number, so row order
+    is not stable across removals - callers that need a person's row look
+    it up with ``slot_of``.
+
+    Every row change is forwarded to the search ``index``.
+    """
+
+    # Compact the block once this share of its rows has been freed
+    COMPACT_FRACTION = 0.25
+
+    def __init__(self, dim: int = 512, initial_capacity: int = 256,
+                 index: Optional[GalleryIndex] = None, max_templates: int = 1):
+        """
+        Initialize an empty gallery
+
+        Args:
+            dim: Embedding dimension (512 for ArcFace)
+            initial_capacity: Number of persons (and templates) allocated up front
+            index: Search index (default: exact brute-force search)
+            max_templates: Templates kept per person (extra ones are dropped)
+        """
+        self.dim = dim
+        self.max_templates = max(1, max_templates)
+        self.index = index if index is not None else ExactIndex()
+        capacity = max(1, initial_capacity)
+        self._templates = np.zeros((capacity, dim), dtype=np.float32)
+        self._owners = np.full(capacity, -1, dtype=np.int64)  # Row of each template, -1 if freed
+        self._used = 0  # Block rows in use, freed ones included
+        self._freed = 0
+        self._offsets = np.zeros(capacity, dtype=np.int64)
+        self._counts = np.zeros(capacity, dtype=np.int64)
+        self._segments: Optional[Tuple[np.ndarray, np.ndarray, bool]] = None
+        self._records: List[GalleryRecord] = []
+        self._slot_by_id: Dict[int, int] = {}
+        self._slot_by_student_id: Dict[str, int] = {}
+        self.version = 0  # Bumped on every change
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def __contains__(self, person_id: int) -> bool:
+        return person_id in self._slot_by_id
+
+    @property
+    def template_counts(self) -> np.ndarray:
+        """Number of templates of each occupied row (do not modify)"""
+        return self._counts[:len(self._records)]
+
+    @property
+    def stored_templates(self) -> int:
+        """Number of templates of all persons together"""
+        return self._used - self._freed
+
+    @property
+    def records(self) -> List[GalleryRecord]:
+        """Records in row order (do not modify)"""
+        return self._records
+
+    @property
+    def capacity(self) -> int:
+        """Number of persons allocated"""
+        return self._offsets.shape[0]
+
+    def template_block(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Every stored template with the row it belongs to
+
+        Returns:
+            Tuple of ((templates x dim) embeddings, row of each template)
+        """
+        owners = self._owners[:self._used]
+        live = owners >= 0
+        return self._templates[:self._used][live], owners[live]
+
+    def slot_of(self, person_id: int) -> Optional[int]:
+        """Row index of a person, or None if not enrolled"""
+        return self._slot_by_id.get(person_id)
+
+    def get(self, person_id: int) -> Optional[GalleryRecord]:
+        """Look up a person by database id"""
+        slot = self._slot_by_id.get(person_id)
+        return self._records[slot] if slot is not None else None
+
+    def get_by_student_id(self, student_id: str) -> Optional[GalleryRecord]:
+        """Look up a person by student_id"""
+        slot = self._slot_by_student_id.get(student_id)
+        return self._records[slot] if slot is not None else None
+
+    def slots_for_student_ids(self, student_ids: Iterable[str]) -> np.ndarray:
+        """Rows of the enrolled persons among ``student_ids`` (others are ignored)"""
+        slots = [self._slot_by_student_id.get(student_id) for student_id in student_ids]
+        return np.array([slot for slot in slots if slot is not None], dtype=np.int64)
+
+    def scores(self, queries: np.ndarray, slots: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Similarity of every query with every person (best matching template)
+
+        Args:
+            queries: (queries x dim) normalized embeddings
+            slots: Only score these rows (default: all)
+
+        Returns:
+            (queries x persons) float32 similarity matrix
+        """
+        queries = np.ascontiguousarray(queries, dtype=np.float32).reshape(-1, self.dim)
+        if slots is not None:
+            return self._slot_scores(queries, np.asarray(slots, dtype=np.int64))
+
+        n = len(self._records)
+        if n == 0:
+            return np.empty((len(queries), 0), dtype=np.float32)
+
+        starts, owners, in_row_order = self._segment_layout()
+        block_scores = queries @ self._templates[:self._used].T
+        if len(starts) < self._used:
+            block_scores = np.maximum.reduceat(block_scores, starts, axis=1)
+        if in_row_order:
+            return block_scores
+
+        # Segments sit in block order (removals and re-enrolments reorder
+        # them, and freed rows form segments of their own)
+        scores = np.empty((len(queries), n), dtype=np.float32)
+        live = owners >= 0
+        scores[:, owners[live]] = block_scores[:, live]
+        return scores
+
+    def search(self, queries: np.ndarray, k: int = 1,
+               slots: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Most similar persons for each query embedding
+
+        Args:
+            queries: (queries x dim) normalized embeddings
+            k: Number of results per query
+            slots: Only consider these rows (searched exactly, bypassing
+                the index); e.g. from ``slots_for_student_ids``
+
+        Returns:
+            Tuple of (similarities, slots), both (queries x k), best first;
+            padded with -inf and -1 when there are fewer candidate rows
+        """
+        queries = np.ascontiguousarray(queries, dtype=np.float32).reshape(-1, self.dim)
+        if slots is None:
+            return self.index.search(queries, self, k)
+
+        scores, columns = top_k(self.scores(queries, slots), k)
+        if len(slots) == 0:
+            return scores, columns
+        return scores, np.where(columns >= 0, slots[columns], -1)
+
+    def get_templates(self, person_id: int) -> Optional[np.ndarray]:
+        """Copy of a person's (templates x dim) templates, or None if not enrolled"""
+        slot = self._slot_by_id.get(person_id)
+        if slot is None:
+            return None
+        offset = self._offsets[slot]
+        return self._templates[offset:offset + self._counts[slot]].copy()
+
+    def upsert(self, record: GalleryRecord, templates: np.ndarray) -> int:
+        """
+        Add a person, or replace their record and templates
+
+        Args:
+            record: Identity metadata (``record.id`` is the key)
+            templates: One embedding of size ``dim``, or several as a
+                (templates x dim) array or a flat block of them; only the
+                first ``max_templates`` are kept
+
+        Returns:
+            Row index of the person
+
+        Raises:
+            ValueError: If the templates do not match the gallery dimension
+        """
+        templates = self._check_templates(templates)
+
+        slot = self._slot_by_id.get(record.id)
+        if slot is None:
+            slot = len(self._records)
+            self._ensure_capacity(slot + 1)
+            self._records.append(record)
+            self._slot_by_id[record.id] = slot
+            self._counts[slot] = 0
+        else:
+            old = self._records[slot]
+            if old.student_id is not None and self._slot_by_student_id.get(old.student_id) == slot:
+                del self._slot_by_student_id[old.student_id]
+            self._records[slot] = record
+
+        if record.student_id is not None:
+            self._slot_by_student_id[record.student_id] = slot
+
+        if self._counts[slot] == len(templates):
+            # Same number of templates: overwrite them in place
+            offset = self._offsets[slot]
+            self._templates[offset:offset + len(templates)] = templates
+        else:
+            self._free_rows(slot)
+            self._ensure_block(self._used + len(templates))
+            self._templates[self._used:self._used + len(templates)] = templates
+            self._owners[self._used:self._used + len(templates)] = slot
+            self._offsets[slot] = self._used
+            self._counts[slot] = len(templates)
+            self._used += len(templates)
+            self._segments = None
+            self._maybe_compact()
+
+        self.index.add(slot, templates)
+        self.version += 1
+        return slot
+
+    def remove(self, person_id: int) -> bool:
+        """
+        Remove a person (the last person moves into the freed row number)
+
+        Returns:
+            True if the person was enrolled
+        """
+        slot = self._slot_by_id.pop(person_id, None)
+        if slot is None:
+            return False
+
+        record = self._records[slot]
+        if record.student_id is not None and self._slot_by_student_id.get(record.student_id) == slot:
+            del self._slot_by_student_id[record.student_id]
+
+        self.index.remove(slot)
+        self._free_rows(slot)
+        last = len(self._records) - 1
+        if slot != last:
+            moved = self._records[last]
+            self._records[slot] = moved
+            offset, count = self._offsets[last], self._counts[last]
+            self._offsets[slot] = offset
+            self._counts[slot] = count
+            self._owners[offset:offset + count] = slot
+            self._slot_by_id[moved.id] = slot
+            if moved.student_id is not None and self._slot_by_student_id.get(moved.student_id) == last:
+                self._slot_by_student_id[moved.student_id] = slot
+            self.index.move(last, slot)
+        self._records.pop()
+        self._segments = None
+        self._maybe_compact()
+        self.version += 1
+        return True
+
+    def remove_by_student_id(self, student_id: str) -> bool:
+        """Remove a person by student_id"""
+        record = self.get_by_student_id(student_id)
+        return self.remove(record.id) if record is not None else False
+
+    def replace_all(self, entries: Iterable[Tuple[GalleryRecord, np.ndarray]]) -> int:
+        """
+        Rebuild the gallery from scratch
+
+        Entries with templates of the wrong size are skipped with a warning.
+
+        Returns:
+            Number of persons loaded
+        """
+        self._records = []
+        self._slot_by_id = {}
+        self._slot_by_student_id = {}
+        self._used = 0
+        self._freed = 0
+        self._segments = None
+        self.index.reset()
+        for record, templates in entries:
+            try:
+                self.upsert(record, templates)
+            except ValueError as e:
+                logger.warning(f"⚠️ Skipping person {record.id}: {str(e)}")
+        self.version += 1
+        return len(self._records)
+
+    def clear(self) -> None:
+        """Remove every person"""
+        self.replace_all([])
+
+    def _slot_scores(self, queries: np.ndarray, slots: np.ndarray) -> np.ndarray:
+        """``scores`` restricted to some rows: gather their templates, then reduce"""
+        if len(slots) == 0:
+            return np.empty((len(queries), 0), dtype=np.float32)
+
+        offsets = self._offsets[slots]
+        counts = self._counts[slots]
+        if (counts == 1).all():
+            return queries @ self._templates[offsets].T
+
+        starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+        rows = np.repeat(offsets - starts, counts) + np.arange(int(counts.sum()))
+        return np.maximum.reduceat(queries @ self._templates[rows].T, starts, axis=1)
+
+    def _segment_layout(self) -> Tuple[np.ndarray, np.ndarray, bool]:
+        """
+        Runs of block rows with one owner, for the segment max in ``scores``
+
+        Returns:
+            Tuple of (first block row of each run, owning row or -1 for freed
+            rows, whether the runs are exactly rows 0..n-1 in order)
+        """
+        if self._segments is None:
+            owners = self._owners[:self._used]
+            starts = np.concatenate([[0], np.flatnonzero(owners[1:] != owners[:-1]) + 1])
+            segment_owners = owners[starts]
+            in_row_order = (len(starts) == len(self._records)
+                            and bool((segment_owners == np.arange(len(starts))).all()))
+            self._segments = (starts, segment_owners, in_row_order)
+        return self._segments
+
+    def _free_rows(self, slot: int) -> None:
+        """Mark a row's templates as freed block rows"""
+        count = self._counts[slot]
+        if count:
+            offset = self._offsets[slot]
+            self._owners[offset:offset + count] = -1
+            self._freed += int(count)
+            self._counts[slot] = 0
+
+    def _maybe_compact(self) -> None:
+        """Rewrite the block in row order once enough of it is freed"""
+        if self._freed == 0 or self._freed < self.COMPACT_FRACTION * self._used:
+            return
+        templates, owners = self.template_block()
+        order = np.argsort(owners, kind='stable')
+        used = len(order)
+        self._templates[:used] = templates[order]
+        self._owners[:used] = owners[order]
+        self._owners[used:self._used] = -1
+        n = len(self._records)
+        self._offsets[:n] = np.concatenate([[0], np.cumsum(self._counts[:n])[:-1]])
+        self._used = used
+        self._freed = 0
+        self._segments = None
+
+    def _check_templates(self, templates: np.ndarray) -> np.ndarray:
+        """Validate templates and return them as a (templates x dim) float32 array"""
+        flat = np.asarray(templates, dtype=np.float32).reshape(-1)
+        if flat.size == 0 or flat.size % self.dim:
+            raise ValueError(f"embedding size {flat.size} does not match gallery dimension {self.dim}")
+        return flat.reshape(-1, self.dim)[:self.max_templates]
+
+    def _ensure_capacity(self, rows: int) -> None:
+        """Grow the per-person arrays (doubling) so they hold at least ``rows`` persons"""
+        capacity = self._offsets.shape[0]
+        if rows <= capacity:
+            return
+        while capacity < rows:
+            capacity *= 2
+        for name in ('_offsets', '_counts'):
+            grown = np.zeros(capacity, dtype=np.int64)
+            grown[:len(self._records)] = getattr(self, name)[:len(self._records)]
+            setattr(self, name, grown)
+
+    def _ensure_block(self, rows: int) -> None:
+        """Grow the template block (doubling) so it holds at least ``rows`` templates"""
+        capacity = self._templates.shape[0]
+        if rows <= capacity:
+            return
+        while capacity < rows:
+            capacity *= 2
+        templates = np.zeros((capacity, self.dim), dtype=np.float32)
+        templates[:self._used] = self._templates[:self._used]
+        owners = np.full(capacity, -1, dtype=np.int64)
+        owners[:self._used] = self._owners[:self._used]
+        self._templates = templates
+        self._owners = owners
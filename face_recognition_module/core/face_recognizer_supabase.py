@@ -8,35 +8,67 @@ import cv2
 import uuid
 import time
 import logging
-from datetime import datetime
-from typing import List, Dict, Optional, Tuple
+from datetime import datetime, timedelta
+from typing import Iterable, List, Dict, Optional, Tuple
 from .face_encoder import FaceEncoder
+from .embedding_gallery import EmbeddingGallery, GalleryRecord
+from .gallery_index import create_index
+from .assignment import assign_one_to_one
+from .templates import DEFAULT_MAX_TEMPLATES, build_templates, merge_templates
 from ..database import DatabaseManager, PersonTable, AttendanceTable, RecognitionLogTable
 
 logger = logging.getLogger(__name__)
 
+# Delta refreshes re-read rows updated slightly before the last one seen, so a
+# write that committed late with an earlier updated_at is not missed
+SYNC_OVERLAP = timedelta(seconds=60)
+
+# A delta sync that would drop more than this share of the gallery as deleted
+# more likely read an incomplete ID list; it does a full reload instead
+MAX_SYNC_DELETE_FRACTION = 0.25
+
+# Gallery rows considered per face when assigning faces one-to-one
+ASSIGNMENT_CANDIDATES = 10
+
+# Upper bound on the candidates returned per face (top_k)
+MAX_TOP_K = 20
+
 class FaceRecognizerWithSupabase:
     """
     Advanced face recognition system with Supabase database integration
     Replaces the simple in-memory storage with persistent database storage
     """
     
-    def __init__(self, similarity_threshold: float = 0.4):
+    def __init__(self, similarity_threshold: float = 0.4, index: str = 'exact',
+                 index_options: Optional[Dict] = None, max_templates: int = DEFAULT_MAX_TEMPLATES):
         """
         Initialize Face Recognizer with Supabase
         
         Args:
             similarity_threshold: Minimum similarity score for positive identification
+            index: Gallery search index, 'exact' (brute force) or 'ivf'
+                (approximate, for galleries of tens of thousands of persons)
+            index_options: Extra arguments for the index (e.g. {'nprobe': 16})
+            max_templates: Face templates kept per person
         """
         self.encoder = FaceEncoder()
         self.similarity_threshold = similarity_threshold
         self.db_manager = DatabaseManager()
         
-        # Cache for frequently accessed data
-        self._person_cache = {}
+        self.index_type = index
+        self.index_options = index_options or {}
+        self.max_templates = max_templates
+        
+        # Enrolled persons and their embeddings, kept in one contiguous
+        # (persons x dims) float32 matrix and updated in place
+        self.gallery = self._new_gallery()
         self._cache_timestamp = None
         self._cache_duration = 300  # 5 minutes
         
+        # Newest updated_at read from the database; later refreshes only
+        # fetch rows changed since then
+        self._sync_watermark: Optional[datetime] = None
+        
         logger.info(f"🎯 FaceRecognizerWithSupabase initialized - Threshold: {similarity_threshold}")
     
     async def initialize_database(self) -> bool:
@@ -62,47 +94,129 @@ class FaceRecognizerWithSupabase:
     
     async def _refresh_person_cache(self) -> None:
         """
-        Refresh the person cache from database
+        Reload the whole person cache from database
         """
         try:
-            persons = await self.db_manager.get_all_persons()
-            self._person_cache = {}
-            
-            for person in persons:
-                if person.face_embedding:
-                    embedding = person.get_face_embedding()
-                    if embedding is not None:
-                        self._person_cache[person.id] = {
-                            'id': person.id,
-                            'name': person.name,
-                            'embedding': embedding,
-                            'student_id': person.student_id,
-                            'employee_id': person.employee_id,
-                            'department': person.department,
-                            'role': person.role
-                        }
-            
+            # Decode page by page into a new gallery, so only one page of
+            # base64 rows is held at a time and recognition keeps using the
+            # old gallery until the whole table has loaded
+            gallery = self._new_gallery(initial_capacity=max(len(self.gallery), 256))
+            watermark = None
+            async for persons in self.db_manager.iter_recognition_persons():
+                watermark = self._newest_update(persons, watermark)
+                for person in persons:
+                    if person.face_embedding:
+                        embedding = person.get_face_embedding()
+                        if embedding is not None:
+                            try:
+                                gallery.upsert(GalleryRecord.from_person(person), embedding)
+                            except ValueError as e:
+                                logger.warning(f"⚠️ Skipping person {person.id}: {str(e)}")
+            
+            self.gallery = gallery
+            self._sync_watermark = watermark
             self._cache_timestamp = time.time()
-            logger.info(f"🔄 Person cache refreshed: {len(self._person_cache)} persons loaded")
+            logger.info(f"🔄 Person cache refreshed: {len(self.gallery)} persons loaded")
             
         except Exception as e:
             logger.error(f"❌ Error refreshing person cache: {str(e)}")
     
+    def _new_gallery(self, initial_capacity: int = 256) -> EmbeddingGallery:
+        """Create an empty gallery with the configured search index"""
+        return EmbeddingGallery(initial_capacity=initial_capacity,
+                                index=create_index(self.index_type, **self.index_options),
+                                max_templates=self.max_templates)
+    
+    async def _sync_person_cache(self) -> None:
+        """
+        Bring the person cache up to date by fetching only what changed
+        
+        Rows updated since the last sync are applied to the gallery in place
+        (including persons whose recognition was disabled). Deleted rows
+        leave no trace to fetch, so the IDs still in the table are compared
+        with the gallery and missing persons are dropped. Falls back to a
+        full reload when nothing has been loaded yet, or when the deletion
+        check would drop more than ``MAX_SYNC_DELETE_FRACTION`` of the
+        gallery.
+        """
+        if self._sync_watermark is None:
+            await self._refresh_person_cache()
+            return
+        
+        try:
+            watermark = self._sync_watermark
+            changed = 0
+            async for persons in self.db_manager.iter_recognition_persons(
+                    updated_since=self._sync_watermark - SYNC_OVERLAP):
+                watermark = self._newest_update(persons, watermark)
+                for person in persons:
+                    self._update_gallery(person)
+                changed += len(persons)
+            
+            enrolled_ids = await self.db_manager.get_recognition_person_ids()
+            deleted = [record.id for record in self.gallery.records if record.id not in enrolled_ids]
+            if len(deleted) > MAX_SYNC_DELETE_FRACTION * len(self.gallery):
+                logger.warning(f"⚠️ Sync would remove {len(deleted)} of {len(self.gallery)} cached persons, "
+                               f"doing a full reload instead")
+                await self._refresh_person_cache()
+                return
+            for person_id in deleted:
+                self.gallery.remove(person_id)
+            
+            self._sync_watermark = watermark
+            self._cache_timestamp = time.time()
+            logger.info(f"🔄 Person cache synced: {changed} changed, {len(deleted)} removed, "
+                        f"{len(self.gallery)} persons cached")
+            
+        except Exception as e:
+            logger.error(f"❌ Error syncing person cache: {str(e)}")
+    
+    @staticmethod
+    def _newest_update(persons: List[PersonTable], watermark: Optional[datetime]) -> Optional[datetime]:
+        """Latest of the watermark and the persons' updated_at"""
+        for person in persons:
+            if person.updated_at and (watermark is None or person.updated_at > watermark):
+                watermark = person.updated_at
+        return watermark
+    
+    def _update_gallery(self, person: PersonTable) -> None:
+        """
+        Apply a saved person to the gallery without reloading the cache
+        
+        Args:
+            person: Person as stored in the database
+        """
+        embedding = person.get_face_embedding() if person.face_embedding else None
+        if embedding is None or not person.recognition_enabled:
+            self.gallery.remove(person.id)
+            return
+        try:
+            self.gallery.upsert(GalleryRecord.from_person(person), embedding)
+        except ValueError as e:
+            logger.warning(f"⚠️ Person {person.id} not added to gallery: {str(e)}")
+    
     async def _check_cache_validity(self) -> None:
         """
         Check if cache needs refresh
         """
         if (not self._cache_timestamp or 
             time.time() - self._cache_timestamp > self._cache_duration):
-            await self._refresh_person_cache()
+            await self._sync_person_cache()
     
-    async def train_person(self, person_data: Dict, image_data_list: List) -> Dict:
+    async def train_person(self, person_data: Dict, image_data_list: List, append: bool = True) -> Dict:
         """
         Train the system to recognize a specific person and save to Supabase
         
+        The images are summarized as up to ``max_templates`` templates (see
+        templates.py). For a person who is already enrolled, the new images
+        are merged into their stored templates, so old images never need to
+        be encoded again.
+        
         Args:
             person_data: Dictionary with person information (name, student_id, etc.)
             image_data_list: List of image data (bytes or numpy arrays)
+            append: Merge with the person's existing templates instead of
+                replacing them
             
         Returns:
             Training result dictionary
@@ -135,8 +249,22 @@ class FaceRecognizerWithSupabase:
             return result
         
         try:
-            # Average embeddings for robust representation
-            avg_embedding = np.mean(embeddings, axis=0)
+            # Check if person already exists (by student_id)
+            existing_person = None
+            if person_data.get('student_id'):
+                existing_person = await self.db_manager.get_person_by_student_id(person_data['student_id'])
+            
+            # Keep several templates rather than one mean vector, so varied
+            # poses and lighting each keep a close match
+            new_embeddings = np.stack(embeddings).astype(np.float32)
+            existing_templates = existing_person.get_face_templates(new_embeddings.shape[1]) if existing_person else None
+            if append and existing_templates is not None:
+                previous_count = existing_person.training_images_count or 0
+                images_count = previous_count + len(embeddings)
+                templates = merge_templates(existing_templates, previous_count, new_embeddings, self.max_templates)
+            else:
+                images_count = len(embeddings)
+                templates = build_templates(new_embeddings, max_templates=self.max_templates)
             
             # Create or update person in database
             person = PersonTable(
@@ -147,18 +275,13 @@ class FaceRecognizerWithSupabase:
                 role=person_data.get('role', 'student'),
                 email=person_data.get('email'),
                 phone=person_data.get('phone'),
-                training_images_count=len(embeddings),
+                training_images_count=images_count,
                 last_trained=datetime.now(),
                 recognition_enabled=True
             )
             
-            # Set face embedding
-            person.set_face_embedding(avg_embedding)
-            
-            # Check if person already exists (by student_id or employee_id)
-            existing_person = None
-            if person.student_id:
-                existing_person = await self.db_manager.get_person_by_student_id(person.student_id)
+            # Set face templates
+            person.set_face_templates(templates)
             
             if existing_person:
                 # Update existing person
@@ -173,8 +296,8 @@ class FaceRecognizerWithSupabase:
             if not saved_person:
                 raise Exception("Failed to save person to database")
             
-            # Refresh cache to include new/updated person
-            await self._refresh_person_cache()
+            # Add or replace the person's gallery row in place
+            self._update_gallery(saved_person)
             
             training_time = (time.time() - start_time) * 1000
             
@@ -184,6 +307,7 @@ class FaceRecognizerWithSupabase:
                 'person_id': saved_person.id,
                 'name': person_name,
                 'images_processed': len(embeddings),
+                'templates': len(templates),
                 'training_time_ms': training_time,
                 'action': action,
                 'database_id': saved_person.id
@@ -205,7 +329,11 @@ class FaceRecognizerWithSupabase:
     
     async def recognize_faces(self, image_data, location: str = None, 
                             save_attendance: bool = False, 
-                            return_annotated_image: bool = True) -> Dict:
+                            return_annotated_image: bool = True,
+                            candidate_student_ids: Optional[Iterable[str]] = None,
+                            fallback_to_global: bool = False,
+                            assignment: Optional[str] = None,
+                            top_k: int = 0) -> Dict:
         """
         Recognize all faces in an image with database integration
         
@@ -214,17 +342,28 @@ class FaceRecognizerWithSupabase:
             location: Location where recognition is happening
             save_attendance: Whether to save attendance records
             return_annotated_image: Whether to return annotated image
+            candidate_student_ids: Only match against these students (e.g. a
+                class roster) instead of everyone enrolled
+            fallback_to_global: With candidate_student_ids, search everyone
+                enrolled for faces that match none of the candidates
+            assignment: None matches every face independently (two faces
+                may get the same person); 'hungarian' or 'greedy' match
+                faces to persons one-to-one, as in a class photo
+            top_k: Also return each face's k most similar persons and the
+                margin between the best two, for reviewing ambiguous faces
+                (at most ``MAX_TOP_K``)
             
         Returns:
             Recognition results dictionary
         """
         start_time = time.time()
         session_id = str(uuid.uuid4())
+        top_k = max(0, min(int(top_k), MAX_TOP_K))
         
         # Ensure cache is valid
         await self._check_cache_validity()
         
-        if not self._person_cache:
+        if len(self.gallery) == 0:
             return {
                 'success': False,
                 'message': "No trained faces in database",
@@ -262,28 +401,54 @@ class FaceRecognizerWithSupabase:
                 'session_id': session_id
             }
         
-        # Prepare known embeddings for vectorized computation
-        known_persons = list(self._person_cache.values())
-        known_embeddings = np.array([person['embedding'] for person in known_persons])
+        # Search the gallery for all faces at once. Take the records with the
+        # scores, before the next await can let a training or delete request
+        # change the gallery
+        known_persons = list(self.gallery.records)
+        face_embeddings = np.stack([face_data['embedding'] for face_data in detected_faces]).astype(np.float32)
+        
+        if candidate_student_ids is None:
+            best_similarities, best_indices = self._match_faces(face_embeddings, assignment=assignment)
+            match_scopes = None
+        else:
+            # Score only the candidates' rows; the search cost then depends
+            # on the roster size, not on how many persons are enrolled
+            candidate_slots = self.gallery.slots_for_student_ids(candidate_student_ids)
+            best_similarities, best_indices = self._match_faces(face_embeddings, slots=candidate_slots,
+                                                                assignment=assignment)
+            match_scopes = np.full(len(detected_faces), 'roster', dtype=object)
+            
+            retry = best_similarities <= self.similarity_threshold
+            if fallback_to_global and retry.any():
+                global_similarities, global_indices = self._match_faces(
+                    face_embeddings[retry], assignment=assignment, exclude=best_indices[~retry])
+                best_similarities[retry] = global_similarities
+                best_indices[retry] = global_indices
+                match_scopes[retry] = 'global'
+        
+        if top_k > 0:
+            # Candidates come from the same scope the face was matched in
+            candidate_similarities, candidate_indices = self.gallery.search(
+                face_embeddings, k=top_k, slots=None if match_scopes is None else candidate_slots)
+            if match_scopes is not None and fallback_to_global and retry.any():
+                candidate_similarities[retry], candidate_indices[retry] = self.gallery.search(
+                    face_embeddings[retry], k=top_k)
+        
+        # Threshold all faces at once
+        matched = best_similarities > self.similarity_threshold
         
         recognition_results = []
         successful_recognitions = 0
         
-        for face_data in detected_faces:
-            face_embedding = face_data['embedding']
-            
-            # Compute similarities with all known faces
-            similarities = np.dot(known_embeddings, face_embedding)
-            
-            # Find best match
-            best_idx = np.argmax(similarities)
-            best_similarity = similarities[best_idx]
+        for face_index, face_data in enumerate(detected_faces):
+            best_idx = best_indices[face_index]
+            best_similarity = best_similarities[face_index]
             
             # Apply threshold
-            if best_similarity > self.similarity_threshold:
+            if matched[face_index]:
                 identified_person = known_persons[best_idx]
-                identified_name = identified_person['name']
-                identified_id = identified_person['id']
+                identified_name = identified_person.name
+                identified_id = identified_person.id
                 confidence = float(best_similarity)
                 successful_recognitions += 1
                 
@@ -306,11 +471,16 @@ class FaceRecognizerWithSupabase:
                 'confidence': confidence,
                 'bbox': face_data['bbox'],
                 'detection_score': face_data['detection_score'],
-                'student_id': identified_person.get('student_id') if identified_id else None,
-                'employee_id': identified_person.get('employee_id') if identified_id else None,
-                'department': identified_person.get('department') if identified_id else None,
-                'role': identified_person.get('role') if identified_id else None
+                'student_id': identified_person.student_id if identified_id else None,
+                'employee_id': identified_person.employee_id if identified_id else None,
+                'department': identified_person.department if identified_id else None,
+                'role': identified_person.role if identified_id else None
             }
+            if match_scopes is not None:
+                result['match_scope'] = match_scopes[face_index] if identified_id else None
+            if top_k > 0:
+                result['candidates'], result['margin'] = self._candidate_list(
+                    known_persons, candidate_similarities[face_index], candidate_indices[face_index])
             recognition_results.append(result)
             
             # Annotate image if requested
@@ -324,7 +494,7 @@ class FaceRecognizerWithSupabase:
                 
                 # Add label with user_id instead of name
                 if identified_id:
-                    student_id = identified_person.get('student_id') or identified_person.get('employee_id') or f"ID-{identified_id}"
+                    student_id = identified_person.student_id or identified_person.employee_id or f"ID-{identified_id}"
                     label = f"{student_id}"
                 else:
                     label = "Unknown"
@@ -398,6 +568,68 @@ class FaceRecognizerWithSupabase:
         logger.info(f"🔍 Recognition completed: {result['message']} in {processing_time:.1f}ms")
         return result
     
+    def _match_faces(self, face_embeddings: np.ndarray, slots: Optional[np.ndarray] = None,
+                     assignment: Optional[str] = None,
+                     exclude: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Best gallery row for each face
+        
+        Args:
+            face_embeddings: (faces x dim) normalized embeddings
+            slots: Only consider these gallery rows
+            assignment: None, 'hungarian' or 'greedy' (see recognize_faces)
+            exclude: Rows already taken by other faces (one-to-one only)
+            
+        Returns:
+            Tuple of (similarities, rows) per face; -inf and -1 where a face
+            was left without a row
+        """
+        if assignment is None:
+            similarities, indices = self.gallery.search(face_embeddings, k=1, slots=slots)
+            return similarities[:, 0], indices[:, 0]
+        
+        # Each face's top candidates are enough: a face would only need a
+        # row past its top ASSIGNMENT_CANDIDATES if other faces took them all
+        _, top_slots = self.gallery.search(face_embeddings, k=ASSIGNMENT_CANDIDATES, slots=slots)
+        candidates = np.unique(top_slots[top_slots >= 0])
+        if exclude is not None and len(exclude):
+            candidates = np.setdiff1d(candidates, exclude)
+        
+        similarities = self.gallery.scores(face_embeddings, candidates)
+        columns = assign_one_to_one(similarities, self.similarity_threshold, assignment)
+        
+        matched = np.flatnonzero(columns >= 0)
+        best_similarities = np.full(len(face_embeddings), -np.inf, dtype=np.float32)
+        best_indices = np.full(len(face_embeddings), -1, dtype=np.int64)
+        best_similarities[matched] = similarities[matched, columns[matched]]
+        best_indices[matched] = candidates[columns[matched]]
+        return best_similarities, best_indices
+    
+    @staticmethod
+    def _candidate_list(known_persons: List[GalleryRecord], similarities: np.ndarray,
+                        indices: np.ndarray) -> Tuple[List[Dict], Optional[float]]:
+        """
+        Ranked candidates of one face
+        
+        Returns:
+            Tuple of (candidates, margin between the first two similarities,
+            or None with fewer than two candidates)
+        """
+        candidates = []
+        for similarity, index in zip(similarities.tolist(), indices.tolist()):
+            if index < 0:
+                break
+            person = known_persons[index]
+            candidates.append({
+                'person_id': person.id,
+                'person_name': person.name,
+                'student_id': person.student_id,
+                'employee_id': person.employee_id,
+                'similarity': similarity
+            })
+        margin = candidates[0]['similarity'] - candidates[1]['similarity'] if len(candidates) > 1 else None
+        return candidates, margin
+    
     async def _save_attendance_record(self, person_id: int, location: str, confidence: float) -> None:
         """
         Save attendance record to database
@@ -524,8 +756,7 @@ class FaceRecognizerWithSupabase:
         try:
             success = await self.db_manager.delete_person(person_id)
             if success:
-                # Refresh cache to remove deleted person
-                await self._refresh_person_cache()
+                self.gallery.remove(person_id)
                 logger.info(f"🗑️ Person {person_id} deleted successfully")
             return success
             
@@ -533,6 +764,21 @@ class FaceRecognizerWithSupabase:
             logger.error(f"❌ Error deleting person {person_id}: {str(e)}")
             return False
     
+    async def delete_person_by_student_id(self, student_id: str) -> bool:
+        """
+        Delete a person from the system by student ID
+        
+        Args:
+            student_id: Student ID to delete
+            
+        Returns:
+            bool: True if successful
+        """
+        success = await self.db_manager.delete_person_by_student_id(student_id)
+        if success:
+            self.gallery.remove_by_student_id(student_id)
+        return success
+    
     async def get_system_stats(self) -> Dict:
         """
         Get system statistics
@@ -546,7 +792,11 @@ class FaceRecognizerWithSupabase:
             stats = {
                 'database_stats': db_stats,
                 'cache_stats': {
-                    'cached_persons': len(self._person_cache),
+                    'cached_persons': len(self.gallery),
+                    'gallery_capacity': self.gallery.capacity,
+                    'max_templates': self.gallery.max_templates,
+                    'gallery_templates': self.gallery.stored_templates,
+                    'index': self.gallery.index.stats(),
                     'cache_age_seconds': time.time() - self._cache_timestamp if self._cache_timestamp else 0
                 },
                 'recognition_config': {
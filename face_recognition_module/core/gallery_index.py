@@ -0,0 +1,342 @@
+"""
+Search Indexes for the Embedding Gallery
+Exact brute-force search, and an inverted-file (IVF) index that only scores
+the few clusters nearest to each query for galleries of tens of thousands
+"""
+
+import logging
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+def top_k(scores: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Best ``k`` columns of every row of a score matrix
+
+    Args:
+        scores: (queries x candidates) similarity matrix
+        k: Number of columns to keep
+
+    Returns:
+        Tuple of (scores, column indices), both (queries x k) and sorted by
+        descending score. Missing columns (fewer than ``k`` candidates) are
+        padded with -inf and -1.
+    """
+    rows, cols = scores.shape
+    out_scores = np.full((rows, k), -np.inf, dtype=np.float32)
+    out_indices = np.full((rows, k), -1, dtype=np.int64)
+    if cols == 0 or k <= 0:
+        return out_scores, out_indices
+
+    n = min(k, cols)
+    if n == 1:
+        indices = np.argmax(scores, axis=1)[:, None]
+    else:
+        indices = np.argpartition(-scores, n - 1, axis=1)[:, :n] if n < cols else np.tile(np.arange(cols), (rows, 1))
+        order = np.argsort(-np.take_along_axis(scores, indices, axis=1), axis=1, kind='stable')
+        indices = np.take_along_axis(indices, order, axis=1)
+    out_indices[:, :n] = indices
+    out_scores[:, :n] = np.take_along_axis(scores, indices, axis=1)
+    return out_scores, out_indices
+
+
+class GalleryIndex(ABC):
+    """
+    Interface of gallery search indexes
+
+    Slots are gallery row numbers; each row holds one person's templates.
+    The gallery reports every change to its rows (add, remove, move) so an
+    index can update itself incrementally, and passes itself to ``search``.
+    Backends must implement ``add``, ``remove`` and ``search``.
+    """
+
+    name = 'base'
+
+    @abstractmethod
+    def add(self, slot: int, templates: np.ndarray) -> None:
+        """Index a new row, or re-index a row whose (templates x dim) templates changed"""
+
+    @abstractmethod
+    def remove(self, slot: int) -> None:
+        """Forget a row"""
+
+    def move(self, src: int, dst: int) -> None:
+        """The row at ``src`` now lives at ``dst`` (``dst`` was removed first)"""
+
+    def reset(self) -> None:
+        """Forget every row (the gallery is being rebuilt)"""
+
+    @abstractmethod
+    def search(self, queries: np.ndarray, gallery, k: int = 1) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Most similar gallery rows for each query
+
+        Args:
+            queries: (queries x dim) float32 normalized embeddings
+            gallery: The EmbeddingGallery being searched
+            k: Number of results per query
+
+        Returns:
+            Tuple of (similarities, slots), both (queries x k), best first;
+            padded with -inf and -1
+        """
+
+    def stats(self) -> Dict:
+        """Index statistics"""
+        return {'type': self.name}
+
+
+class ExactIndex(GalleryIndex):
+    """
+    Brute-force search: score every template of every person
+
+    Always returns the true nearest rows and keeps no state of its own.
+    """
+
+    name = 'exact'
+
+    def add(self, slot: int, templates: np.ndarray) -> None:
+        pass
+
+    def remove(self, slot: int) -> None:
+        pass
+
+    def search(self, queries: np.ndarray, gallery, k: int = 1) -> Tuple[np.ndarray, np.ndarray]:
+        return top_k(gallery.scores(queries), k)
+
+
+class IVFIndex(GalleryIndex):
+    """
+    Inverted-file index over spherical k-means clusters
+
+    Every template of every gallery row is assigned to one of ``nlist``
+    clusters, each stored as its own contiguous block of vectors. A query
+    scores the cluster centroids, then only the templates in its ``nprobe``
+    nearest clusters, keeping each row's best template. It touches roughly
+    ``nprobe / nlist`` of the gallery. Results are approximate: a match whose
+    templates all sit in unprobed clusters is missed (see index_benchmark.py
+    for recall).
+
+    The clusters are trained on the first search once the gallery has
+    ``min_train_size`` rows (smaller galleries are searched exactly) and
+    retrained when the gallery has grown 4x since. In between, new templates
+    go to their nearest existing cluster and removed ones are dropped from it.
+    """
+
+    name = 'ivf'
+
+    def __init__(self, nlist: Optional[int] = None, nprobe: int = 8,
+                 min_train_size: int = 2048, kmeans_iterations: int = 10, seed: int = 0):
+        """
+        Initialize an untrained index
+
+        Args:
+            nlist: Number of clusters (default: 2 * sqrt(number of templates))
+            nprobe: Clusters scored per query (higher is slower but more accurate)
+            min_train_size: Galleries with fewer rows are searched exactly
+            kmeans_iterations: Lloyd iterations when training
+            seed: Random seed for training
+        """
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.min_train_size = min_train_size
+        self.kmeans_iterations = kmeans_iterations
+        self.seed = seed
+        self.reset()
+
+    @property
+    def trained(self) -> bool:
+        return self._centroids is not None
+
+    def reset(self) -> None:
+        self._centroids: Optional[np.ndarray] = None
+        self._vectors: List[np.ndarray] = []
+        self._slots: List[np.ndarray] = []
+        self._sizes: Optional[np.ndarray] = None
+        # slot -> [cluster, position] of each of its templates
+        self._where: Dict[int, List[List[int]]] = {}
+        self._trained_size = 0
+
+    def train(self, gallery) -> None:
+        """Cluster the gallery's templates and rebuild every inverted list"""
+        n = len(gallery)
+        templates, template_slots = gallery.template_block()
+
+        nlist = self.nlist or max(1, int(2 * np.sqrt(len(templates))))
+        nlist = min(nlist, len(templates))
+        self._centroids = _spherical_kmeans(templates, nlist, self.kmeans_iterations, self.seed)
+
+        assignments = self._assign(templates)
+        order = np.argsort(assignments, kind='stable')
+        sizes = np.bincount(assignments, minlength=nlist)
+        bounds = np.concatenate([[0], np.cumsum(sizes)])
+
+        self._vectors = []
+        self._slots = []
+        self._where = {}
+        for cluster in range(nlist):
+            members = order[bounds[cluster]:bounds[cluster + 1]]
+            capacity = max(8, 2 * len(members))
+            vectors = np.zeros((capacity, gallery.dim), dtype=np.float32)
+            vectors[:len(members)] = templates[members]
+            slots = np.full(capacity, -1, dtype=np.int64)
+            slots[:len(members)] = template_slots[members]
+            self._vectors.append(vectors)
+            self._slots.append(slots)
+            for position, slot in enumerate(slots[:len(members)].tolist()):
+                self._where.setdefault(slot, []).append([cluster, position])
+        self._sizes = sizes.astype(np.int64)
+        self._trained_size = n
+        logger.info(f"🗂️ IVF index trained: {len(templates)} templates of {n} persons in {nlist} clusters")
+
+    def add(self, slot: int, templates: np.ndarray) -> None:
+        if not self.trained:
+            return
+        if slot in self._where:
+            self.remove(slot)
+
+        locations = []
+        for vector, cluster in zip(templates, np.argmax(templates @ self._centroids.T, axis=1).tolist()):
+            position = int(self._sizes[cluster])
+            if position == len(self._slots[cluster]):
+                self._vectors[cluster] = np.concatenate([self._vectors[cluster], np.zeros_like(self._vectors[cluster])])
+                self._slots[cluster] = np.concatenate([self._slots[cluster], np.full(position, -1, dtype=np.int64)])
+            self._vectors[cluster][position] = vector
+            self._slots[cluster][position] = slot
+            self._sizes[cluster] += 1
+            locations.append([cluster, position])
+        self._where[slot] = locations
+
+    def remove(self, slot: int) -> None:
+        locations = self._where.pop(slot, None)
+        while locations:
+            cluster, position = locations.pop()
+            last = int(self._sizes[cluster]) - 1
+            if position != last:
+                # Fill the hole with the cluster's last entry and repoint it
+                moved = int(self._slots[cluster][last])
+                self._vectors[cluster][position] = self._vectors[cluster][last]
+                self._slots[cluster][position] = moved
+                moved_locations = locations if moved == slot else self._where[moved]
+                for location in moved_locations:
+                    if location == [cluster, last]:
+                        location[1] = position
+                        break
+            self._slots[cluster][last] = -1
+            self._sizes[cluster] = last
+
+    def move(self, src: int, dst: int) -> None:
+        locations = self._where.pop(src, None)
+        if locations is None:
+            return
+        for cluster, position in locations:
+            self._slots[cluster][position] = dst
+        self._where[dst] = locations
+
+    def search(self, queries: np.ndarray, gallery, k: int = 1) -> Tuple[np.ndarray, np.ndarray]:
+        n = len(gallery)
+        if not self.trained:
+            if n < self.min_train_size:
+                return top_k(gallery.scores(queries), k)
+            self.train(gallery)
+        elif n > 4 * self._trained_size:
+            self.train(gallery)
+
+        nprobe = min(self.nprobe, len(self._centroids))
+        _, probes = top_k(queries @ self._centroids.T, nprobe)
+
+        out_scores = np.full((len(queries), k), -np.inf, dtype=np.float32)
+        out_slots = np.full((len(queries), k), -1, dtype=np.int64)
+        for row, query in enumerate(queries):
+            clusters = probes[row]
+            # Score each cluster block in place rather than copying the blocks together
+            candidate_scores = np.concatenate([self._vectors[c][:self._sizes[c]] @ query for c in clusters])
+            candidate_slots = np.concatenate([self._slots[c][:self._sizes[c]] for c in clusters])
+
+            # Keep each person's best template: sort by score, then take the
+            # first occurrence of every slot
+            order = np.argsort(-candidate_scores, kind='stable')
+            _, first = np.unique(candidate_slots[order], return_index=True)
+            best = order[np.sort(first)[:k]]
+            out_scores[row, :len(best)] = candidate_scores[best]
+            out_slots[row, :len(best)] = candidate_slots[best]
+        return out_scores, out_slots
+
+    def stats(self) -> Dict:
+        stats = {
+            'type': self.name,
+            'trained': self.trained,
+            'nprobe': self.nprobe
+        }
+        if self.trained:
+            stats.update({
+                'nlist': len(self._centroids),
+                'indexed_templates': int(self._sizes.sum()),
+                'largest_cluster': int(self._sizes.max())
+            })
+        return stats
+
+    def _assign(self, embeddings: np.ndarray, chunk_size: int = 8192) -> np.ndarray:
+        """Nearest centroid of every row (chunked to bound memory)"""
+        assignments = np.empty(len(embeddings), dtype=np.int64)
+        for start in range(0, len(embeddings), chunk_size):
+            chunk = embeddings[start:start + chunk_size]
+            assignments[start:start + chunk_size] = np.argmax(chunk @ self._centroids.T, axis=1)
+        return assignments
+
+
+def _spherical_kmeans(embeddings: np.ndarray, clusters: int, iterations: int, seed: int) -> np.ndarray:
+    """
+    Unit-norm cluster centroids of normalized embeddings
+
+    Trains on a sample of at most 64 rows per cluster, which is plenty for
+    centroids and keeps training time independent of gallery size.
+    """
+    rng = np.random.default_rng(seed)
+    sample_size = min(len(embeddings), 64 * clusters)
+    sample = embeddings[rng.choice(len(embeddings), sample_size, replace=False)]
+    centroids = sample[rng.choice(sample_size, clusters, replace=False)].copy()
+
+    for _ in range(iterations):
+        assignments = np.argmax(sample @ centroids.T, axis=1)
+        counts = np.bincount(assignments, minlength=clusters)
+        empty = counts == 0
+        # Sum each cluster's rows as one contiguous block of the sorted sample
+        grouped = sample[np.argsort(assignments, kind='stable')]
+        bounds = np.concatenate([[0], np.cumsum(counts)])
+        sums = np.stack([grouped[bounds[c]:bounds[c + 1]].sum(axis=0) for c in range(clusters)])
+        if empty.any():
+            # Re-seed empty clusters with random sample rows
+            sums[empty] = sample[rng.choice(sample_size, int(empty.sum()), replace=False)]
+        norms = np.linalg.norm(sums, axis=1, keepdims=True)
+        centroids = sums / np.maximum(norms, 1e-12)
+
+    return np.ascontiguousarray(centroids, dtype=np.float32)
+
+
+INDEX_TYPES = {
+    ExactIndex.name: ExactIndex,
+    IVFIndex.name: IVFIndex
+}
+
+
+def create_index(kind: str = 'exact', **options) -> GalleryIndex:
+    """
+    Create a gallery index by name
+
+    Args:
+        kind: 'exact' or 'ivf'
+        **options: Constructor arguments of the index (e.g. nprobe for 'ivf')
+
+    Raises:
+        ValueError: If the index type is unknown
+    """
+    try:
+        index_class = INDEX_TYPES[kind]
+    except KeyError:
+        raise ValueError(f"Unknown gallery index '{kind}', expected one of {sorted(INDEX_TYPES)}")
+    return index_class(**options)
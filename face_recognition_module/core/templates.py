@@ -0,0 +1,95 @@
+"""
+Face Template Sets
+Summarizes a person's training embeddings as a few prototype embeddings
+(templates) instead of one mean vector, so different poses and lighting
+conditions each keep a close match
+"""
+
+import logging
+from typing import Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Templates kept per person
+DEFAULT_MAX_TEMPLATES = 4
+
+
+def build_templates(embeddings: np.ndarray, weights: Optional[np.ndarray] = None,
+                    max_templates: int = DEFAULT_MAX_TEMPLATES, iterations: int = 10) -> np.ndarray:
+    """
+    Pick up to ``max_templates`` prototypes for a set of face embeddings
+
+    With no more embeddings than templates, every embedding is its own
+    template. Otherwise the embeddings are grouped by weighted spherical
+    k-means and each group is represented by its normalized (weighted) mean.
+
+    Args:
+        embeddings: (n x dim) face embeddings
+        weights: Number of images each embedding stands for (default 1 each)
+        max_templates: Maximum number of templates
+        iterations: k-means iterations
+
+    Returns:
+        (templates x dim) float32 unit vectors, the most heavily weighted first
+    """
+    points = _normalize(np.asarray(embeddings, dtype=np.float32).reshape(len(embeddings), -1))
+    weights = np.ones(len(points), dtype=np.float32) if weights is None else np.asarray(weights, dtype=np.float32)
+
+    if len(points) <= max_templates:
+        return np.ascontiguousarray(points[np.argsort(-weights, kind='stable')])
+
+    # Farthest-point initialization: start from the heaviest embedding, then
+    # repeatedly add the embedding least similar to every chosen centroid
+    chosen = [int(np.argmax(weights))]
+    closest = points @ points[chosen[0]]
+    for _ in range(max_templates - 1):
+        chosen.append(int(np.argmin(closest)))
+        closest = np.maximum(closest, points @ points[chosen[-1]])
+    centroids = points[chosen].copy()
+
+    for _ in range(iterations):
+        assignments = np.argmax(points @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignments, points * weights[:, None])
+        empty = ~np.bincount(assignments, minlength=max_templates).astype(bool)
+        sums[empty] = centroids[empty]
+        updated = _normalize(sums)
+        if np.allclose(updated, centroids, atol=1e-6):
+            break
+        centroids = updated
+
+    assignments = np.argmax(points @ centroids.T, axis=1)
+    cluster_weights = np.bincount(assignments, weights=weights, minlength=max_templates)
+    keep = np.argsort(-cluster_weights, kind='stable')
+    keep = keep[cluster_weights[keep] > 0]
+    return np.ascontiguousarray(centroids[keep], dtype=np.float32)
+
+
+def merge_templates(templates: np.ndarray, images_count: int, new_embeddings: np.ndarray,
+                    max_templates: int = DEFAULT_MAX_TEMPLATES) -> np.ndarray:
+    """
+    Add newly encoded images to an existing template set
+
+    The old images are not needed again: each existing template counts as
+    an equal share of the ``images_count`` images it was built from.
+
+    Args:
+        templates: (k x dim) existing templates (k = 1 for a legacy mean vector)
+        images_count: Number of images the existing templates were built from
+        new_embeddings: (n x dim) embeddings of the new images
+        max_templates: Maximum number of templates
+
+    Returns:
+        (templates x dim) float32 unit vectors
+    """
+    templates = np.asarray(templates, dtype=np.float32).reshape(-1, new_embeddings.shape[1])
+    share = max(images_count, len(templates)) / len(templates)
+    points = np.concatenate([templates, np.asarray(new_embeddings, dtype=np.float32)])
+    weights = np.concatenate([np.full(len(templates), share), np.ones(len(new_embeddings))])
+    return build_templates(points, weights, max_templates)
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    return vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
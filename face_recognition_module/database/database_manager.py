@@ -6,12 +6,15 @@ Handles all database operations for face recognition system
 import logging
 import uuid
 from datetime import datetime
-from typing import List, Optional, Dict, Any
+from typing import AsyncIterator, List, Optional, Dict, Any
 from .supabase_client import SupabaseClient
 from .models import PersonTable, AttendanceTable, TrainingImageTable, RecognitionLogTable, SystemConfigTable
 
 logger = logging.getLogger(__name__)
 
+# Columns the recognition cache needs (skips email, phone and other profile data)
+RECOGNITION_COLUMNS = "id,name,student_id,employee_id,department,role,face_embedding,recognition_enabled,updated_at"
+
 class DatabaseManager:
     """
     Database manager for face recognition system using Supabase
@@ -165,6 +168,91 @@ class DatabaseManager:
             logger.error(f"❌ Error retrieving all persons: {str(e)}")
             return []
     
+    async def iter_recognition_persons(self, page_size: int = 1000,
+                                       updated_since: Optional[datetime] = None) -> AsyncIterator[List[PersonTable]]:
+        """
+        Stream every person with recognition enabled, one page at a time
+        
+        Pages are read in id order and each page starts after the last id of
+        the previous one (keyset pagination), so every page is an indexed
+        range scan no matter how far into the table it is. Only the columns
+        in RECOGNITION_COLUMNS are selected.
+        
+        Args:
+            page_size: Rows per request (Supabase caps responses at 1000 by default)
+            updated_since: Only return rows whose updated_at is at or after
+                this time. Persons with recognition disabled are included
+                then, so callers can drop them from their cache
+            
+        Yields:
+            Lists of PersonTable objects
+            
+        Raises:
+            Exception: If a page cannot be read, so callers never mistake a
+                partial load for the full table
+        """
+        last_id = None
+        total = 0
+        while True:
+            query = self.supabase.table('persons').select(RECOGNITION_COLUMNS)
+            if updated_since is None:
+                query = query.eq('recognition_enabled', True)
+            else:
+                query = query.gte('updated_at', updated_since.isoformat())
+            if last_id is not None:
+                query = query.gt('id', last_id)
+            
+            try:
+                result = query.order('id').limit(page_size).execute()
+            except Exception as e:
+                logger.error(f"❌ Error retrieving persons after ID {last_id}: {str(e)}")
+                raise
+            
+            rows = result.data or []
+            if not rows:
+                break
+            
+            # A short page does not mean the end: PostgREST max-rows may cap
+            # pages below page_size, so only an empty page stops the scan
+            total += len(rows)
+            last_id = rows[-1]['id']
+            yield [PersonTable.from_dict(data) for data in rows]
+        
+        logger.info(f"✅ Retrieved {total} persons from database")
+    
+    async def get_recognition_person_ids(self, page_size: int = 1000) -> set:
+        """
+        IDs of all persons with recognition enabled (keyset paginated, id column only)
+        
+        Args:
+            page_size: Rows per request
+            
+        Returns:
+            Set of person IDs
+            
+        Raises:
+            Exception: If a page cannot be read
+        """
+        ids = set()
+        last_id = None
+        while True:
+            query = self.supabase.table('persons').select('id').eq('recognition_enabled', True)
+            if last_id is not None:
+                query = query.gt('id', last_id)
+            
+            try:
+                result = query.order('id').limit(page_size).execute()
+            except Exception as e:
+                logger.error(f"❌ Error retrieving person IDs after ID {last_id}: {str(e)}")
+                raise
+            
+            # Stop on an empty page only (pages may be capped below page_size)
+            rows = result.data or []
+            if not rows:
+                return ids
+            ids.update(row['id'] for row in rows)
+            last_id = rows[-1]['id']
+    
     async def delete_person(self, person_id: int) -> bool:
         """
         Delete person from database (also deletes related records due to CASCADE)
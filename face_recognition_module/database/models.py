@@ -64,6 +64,33 @@ class PersonTable:
                 return None
         return None
     
+    def set_face_templates(self, templates: np.ndarray) -> None:
+        """
+        Store a template set (several embeddings per person)
+        
+        The templates are stored back to back as one float32 block, so a
+        single template is stored exactly like a legacy mean embedding.
+        
+        Args:
+            templates: (templates x dim) face embeddings
+        """
+        self.set_face_embedding(np.ascontiguousarray(templates, dtype=np.float32))
+    
+    def get_face_templates(self, dim: int = 512) -> Optional[np.ndarray]:
+        """
+        Decode the stored template set
+        
+        Args:
+            dim: Embedding dimension
+        
+        Returns:
+            (templates x dim) array, or None if there is no valid embedding
+        """
+        embedding = self.get_face_embedding()
+        if embedding is None or embedding.size == 0 or embedding.size % dim:
+            return None
+        return embedding.reshape(-1, dim)
+    
     def to_dict(self) -> Dict[str, Any]:
         """Convert to dictionary for database operations"""
         data = asdict(self)
@@ -179,8 +179,8 @@ class AttendanceDemo:
         print("   3. Cache valid for 5 minutes, then refresh automatically")
         
         # Get current cache info
-        if hasattr(self.recognizer, '_person_cache'):
-            cache_size = len(getattr(self.recognizer, '_person_cache', {}))
+        if hasattr(self.recognizer, 'gallery'):
+            cache_size = len(self.recognizer.gallery)
             print(f"   📊 Current cache: {cache_size} persons loaded")
     
     async def demonstrate_attendance(self):
@@ -0,0 +1,155 @@
+"""
+Recall vs. latency benchmark for the gallery search indexes
+Builds a synthetic gallery of normalized 512-d embeddings, searches it with
+noisy probes of enrolled identities, and compares every index against exact
+search
+
+Usage:
+    python -m face_recognition_module.index_benchmark --gallery 50000 --batch 32 --nprobe 4 8 16 32
+"""
+
+import argparse
+import json
+import time
+from typing import Dict, List
+
+import numpy as np
+
+from .core.embedding_gallery import EmbeddingGallery, GalleryRecord
+from .core.gallery_index import ExactIndex, IVFIndex
+
+
+def synthetic_gallery(size: int, dim: int = 512, groups: int = 64, seed: int = 0) -> np.ndarray:
+    """
+    Normalized identity embeddings with some cluster structure
+
+    Real face embeddings are not uniform on the sphere (people of similar
+    age, ethnicity or lighting conditions sit closer together), so each
+    identity is drawn around one of ``groups`` shared directions.
+    """
+    rng = np.random.default_rng(seed)
+    centers = _normalize(rng.standard_normal((groups, dim)).astype(np.float32))
+    identities = centers[rng.integers(groups, size=size)] + 0.06 * rng.standard_normal((size, dim)).astype(np.float32)
+    return _normalize(identities)
+
+
+def noisy_probes(gallery: np.ndarray, count: int, similarity: float = 0.65, seed: int = 1):
+    """
+    Query embeddings of enrolled identities, as a new photo would produce
+
+    Returns:
+        Tuple of (probes, true gallery rows); each probe has roughly
+        ``similarity`` cosine similarity with its identity
+    """
+    rng = np.random.default_rng(seed)
+    dim = gallery.shape[1]
+    truth = rng.integers(len(gallery), size=count)
+    sigma = np.sqrt((1 / similarity ** 2 - 1) / dim)
+    probes = gallery[truth] + sigma * rng.standard_normal((count, dim)).astype(np.float32)
+    return _normalize(probes), truth
+
+
+def run(gallery_size: int, queries: int, batch: int, nprobes: List[int],
+        nlist: int = None, similarity: float = 0.65, seed: int = 0, templates: int = 1) -> List[Dict]:
+    """
+    Benchmark exact search and IVF at each nprobe
+
+    With ``templates`` > 1, each person is enrolled with that many slightly
+    different templates around their identity embedding.
+
+    Returns:
+        One result dictionary per index configuration
+    """
+    embeddings = synthetic_gallery(gallery_size, seed=seed)
+    probes, truth = noisy_probes(embeddings, queries, similarity, seed=seed + 1)
+    rng = np.random.default_rng(seed + 2)
+    person_templates = np.stack([
+        _normalize(embeddings + 0.02 * rng.standard_normal(embeddings.shape).astype(np.float32))
+        for _ in range(templates)
+    ], axis=1) if templates > 1 else embeddings[:, None, :]
+
+    configs = [('exact', ExactIndex())]
+    configs += [(f"ivf nprobe={nprobe}", IVFIndex(nlist=nlist, nprobe=nprobe, min_train_size=0, seed=seed))
+                for nprobe in nprobes]
+
+    results = []
+    exact_top1 = None
+    for label, index in configs:
+        gallery = EmbeddingGallery(initial_capacity=gallery_size, index=index, max_templates=templates)
+        for row in range(gallery_size):
+            gallery.upsert(GalleryRecord(row, f"P{row}"), person_templates[row])
+
+        # The first search trains the IVF clusters
+        start = time.perf_counter()
+        gallery.search(probes[:1])
+        build_ms = (time.perf_counter() - start) * 1000
+
+        latencies = []
+        top1 = np.empty(queries, dtype=np.int64)
+        for offset in range(0, queries, batch):
+            start = time.perf_counter()
+            _, slots = gallery.search(probes[offset:offset + batch])
+            latencies.append((time.perf_counter() - start) * 1000)
+            top1[offset:offset + batch] = slots[:, 0]
+        if exact_top1 is None:
+            exact_top1 = top1
+
+        # Incremental maintenance: enrol and delete a person
+        start = time.perf_counter()
+        for row in range(200):
+            gallery.upsert(GalleryRecord(-1 - row, 'new'), person_templates[row])
+        for row in range(200):
+            gallery.remove(-1 - row)
+        update_us = (time.perf_counter() - start) * 1e6 / 400
+
+        latencies = np.array(latencies)
+        results.append({
+            'index': label,
+            'gallery_size': gallery_size,
+            'batch': batch,
+            'build_ms': round(build_ms, 1),
+            'p50_batch_ms': round(float(np.percentile(latencies, 50)), 3),
+            'p99_batch_ms': round(float(np.percentile(latencies, 99)), 3),
+            'per_face_us': round(float(latencies.sum() * 1000 / queries), 1),
+            'recall_at_1': round(float(np.mean(top1 == exact_top1)), 4),
+            'identification_accuracy': round(float(np.mean(top1 == truth)), 4),
+            'update_us': round(update_us, 1),
+            'index_stats': gallery.index.stats()
+        })
+    return results
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--gallery', type=int, default=50000, help='enrolled persons')
+    parser.add_argument('--queries', type=int, default=2048, help='probe faces in total')
+    parser.add_argument('--batch', type=int, default=32, help='faces per search call (faces in one photo)')
+    parser.add_argument('--nprobe', type=int, nargs='+', default=[1, 4, 8, 16, 32], help='IVF clusters probed')
+    parser.add_argument('--nlist', type=int, default=None, help='IVF clusters (default: 2 * sqrt(gallery))')
+    parser.add_argument('--similarity', type=float, default=0.65, help='probe-to-identity cosine similarity')
+    parser.add_argument('--templates', type=int, default=1, help='templates per person')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', action='store_true', help='print the results as JSON')
+    args = parser.parse_args()
+
+    results = run(args.gallery, args.queries, args.batch, args.nprobe,
+                  args.nlist, args.similarity, args.seed, args.templates)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{args.gallery} persons x {args.templates} templates, {args.queries} probes in batches of {args.batch}")
+    print(f"{'index':<16}{'build ms':>10}{'p50 ms':>10}{'p99 ms':>10}{'us/face':>10}"
+          f"{'recall@1':>10}{'accuracy':>10}{'update us':>11}")
+    for r in results:
+        print(f"{r['index']:<16}{r['build_ms']:>10.1f}{r['p50_batch_ms']:>10.3f}{r['p99_batch_ms']:>10.3f}"
+              f"{r['per_face_us']:>10.1f}{r['recall_at_1']:>10.4f}{r['identification_accuracy']:>10.4f}"
+              f"{r['update_us']:>11.1f}")
+
+
+if __name__ == '__main__':
+    main()
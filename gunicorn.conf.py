@@ -0,0 +1,50 @@
+"""
+Gunicorn settings for the priority prediction service (see wsgi.py)
+Every value can be overridden through the PRIORITY_* environment variables
+"""
+
+import multiprocessing
+import os
+
+bind = os.environ.get('PRIORITY_BIND', '127.0.0.1:5000')
+
+# Threaded workers: predictions release the GIL in NumPy/sklearn and most of
+# /update_priorities is spent waiting on Supabase
+worker_class = 'gthread'
+workers = int(os.environ.get('PRIORITY_WORKERS', multiprocessing.cpu_count()))
+threads = int(os.environ.get('PRIORITY_THREADS', 4))
+
+# Load the app (and the model) once in the master, before forking
+preload_app = True
+
+timeout = int(os.environ.get('PRIORITY_TIMEOUT', 60))
+graceful_timeout = int(os.environ.get('PRIORITY_GRACEFUL_TIMEOUT', 30))
+keepalive = 5
+
+accesslog = os.environ.get('PRIORITY_ACCESS_LOG')
+loglevel = os.environ.get('PRIORITY_LOG_LEVEL', 'info')
+
+# Prometheus multiprocess mode: the metrics directory must exist before the
+# app is preloaded (this file is read again on every HUP, so nothing is
+# removed here; see on_starting)
+_metrics_dir = os.environ.get('PROMETHEUS_MULTIPROC_DIR')
+if _metrics_dir:
+    os.makedirs(_metrics_dir, exist_ok=True)
+
+
+def on_starting(server):
+    """Start every server run with an empty Prometheus metrics directory"""
+    # A master started by a USR2 upgrade shares the directory with the old
+    # master's live workers, so only a fresh start clears it
+    if not _metrics_dir or 'GUNICORN_PID' in os.environ:
+        return
+    # on_starting runs after the preload, so keep the master's own files
+    own_suffix = '_{}.db'.format(os.getpid())
+    for name in os.listdir(_metrics_dir):
+        if name.endswith('.db') and not name.endswith(own_suffix):
+            os.remove(os.path.join(_metrics_dir, name))
+
+def child_exit(server, worker):
+    """Clean up a dead worker's Prometheus files (PROMETHEUS_MULTIPROC_DIR)"""
+    from priority_module.metrics import mark_process_dead
+    mark_process_dead(worker.pid)
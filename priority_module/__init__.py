@@ -0,0 +1,29 @@
+# Priority Prediction Module for Campus Management System
+# Model loading and serving helpers for the report priority service (app.py)
+
+from .cache import PredictionCache
+from .compiled import CompiledPriorityModel
+from .encoder import FeatureEncoder, FEATURE_FIELDS
+from .jobs import TrainingJob, TrainingJobConflict, TrainingJobManager
+from .metrics import PriorityMetrics
+from .registry import ModelRegistry, ModelSnapshot
+from .scoring import PRIORITY_LEVELS, rule_priority_levels, score_reports
+from .store import ModelStore, ModelStoreError
+
+__all__ = [
+    'CompiledPriorityModel',
+    'FeatureEncoder',
+    'FEATURE_FIELDS',
+    'ModelRegistry',
+    'ModelSnapshot',
+    'ModelStore',
+    'ModelStoreError',
+    'PredictionCache',
+    'PriorityMetrics',
+    'PRIORITY_LEVELS',
+    'rule_priority_levels',
+    'score_reports',
+    'TrainingJob',
+    'TrainingJobConflict',
+    'TrainingJobManager'
+]
@@ -0,0 +1,86 @@
+"""
+Bounded LRU cache of priority predictions
+Real reports repeat a small set of category combinations, so most single-report
+predictions can skip the model entirely
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+
+class PredictionCache:
+    """
+    Thread-safe LRU mapping of (model version, encoded report) -> prediction
+
+    Callers put the model version into the key, so a retrained model never
+    sees the old model's answers; stale entries simply age out. The cache is
+    per process - each server worker keeps its own.
+    """
+
+    def __init__(self, max_entries: int = 4096):
+        """
+        Initialize an empty cache
+
+        Args:
+            max_entries: Maximum number of cached predictions (0 disables caching)
+        """
+        self.max_entries = max_entries
+        self._entries: 'OrderedDict[Hashable, Tuple[int, float]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable) -> Optional[Tuple[int, float]]:
+        """
+        Look up a prediction, marking it as recently used
+
+        Returns:
+            Cached (priority level, confidence), or None on a miss
+        """
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Hashable, value: Tuple[int, float]) -> int:
+        """
+        Store a prediction, evicting the least recently used one when full
+
+        Returns:
+            Number of entries evicted to make room
+        """
+        if self.max_entries <= 0:
+            return 0
+        evicted = 0
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                evicted += 1
+            self.evictions += evicted
+        return evicted
+
+    def clear(self) -> None:
+        """Drop every cached prediction (counters are kept)"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters for health checks"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else None
+            }
@@ -0,0 +1,130 @@
+"""
+Compiled lookup-table priority model
+Evaluates the trained forest once over every category combination so that
+serving a prediction is a single table index
+"""
+
+import logging
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .encoder import FeatureEncoder, FEATURE_FIELDS
+
+logger = logging.getLogger(__name__)
+
+# Refuse to compile feature spaces larger than this many combinations
+DEFAULT_MAX_CELLS = 1_000_000
+
+
+class CompiledPriorityModel:
+    """
+    Dense table of forest outputs indexed by category combination
+
+    Each field gets one slot per value seen in training plus slot 0 for
+    "no active column" (None or a value the forest never saw). Slot 0 is
+    exactly the all-zero block the forest receives for such values, so the
+    table answers every well-formed report with the same level and
+    confidence the forest would return.
+    """
+
+    def __init__(self, encoder: FeatureEncoder, levels: np.ndarray, confidences: np.ndarray):
+        """
+        Wrap precomputed tables (use ``from_forest`` to build them)
+
+        Args:
+            encoder: Encoder of the model the tables were computed from
+            levels: Flat int table of predicted priority levels per cell
+            confidences: Flat float64 table of max class probability per cell
+        """
+        self.slot_lookups = tuple(
+            (field, {value: slot + 1 for slot, value in enumerate(encoder.field_columns[field])})
+            for field in FEATURE_FIELDS
+        )
+        self.shape = tuple(len(lookup) + 1 for _, lookup in self.slot_lookups)
+        self.strides = tuple(int(np.prod(self.shape[i + 1:])) for i in range(len(self.shape)))
+        self.levels = levels
+        self.confidences = confidences
+
+    @property
+    def cells(self) -> int:
+        """Number of category combinations in the table"""
+        return int(self.levels.shape[0])
+
+    @classmethod
+    def from_forest(cls, model, encoder: FeatureEncoder,
+                    max_cells: int = DEFAULT_MAX_CELLS) -> Optional['CompiledPriorityModel']:
+        """
+        Compile a fitted classifier into lookup tables
+
+        Args:
+            model: Fitted classifier with ``predict_proba`` and ``classes_``
+            encoder: Encoder built from the model's feature columns
+            max_cells: Upper bound on the number of combinations to enumerate
+
+        Returns:
+            Compiled model, or None when the feature space is too large
+        """
+        shape = tuple(len(encoder.field_columns[field]) + 1 for field in FEATURE_FIELDS)
+        cells = int(np.prod(shape))
+        if cells > max_cells:
+            logger.warning(f"Feature space has {cells} combinations, not compiling (limit {max_cells})")
+            return None
+
+        # Every combination of slots, in row-major order of the table
+        slots = np.indices(shape).reshape(len(shape), -1).T
+        features = np.zeros((cells, encoder.n_features), dtype=np.float32)
+        for position, field in enumerate(FEATURE_FIELDS):
+            column_of_slot = np.array([-1] + list(encoder.field_columns[field].values()))
+            active = np.nonzero(slots[:, position])[0]
+            features[active, column_of_slot[slots[active, position]]] = 1.0
+
+        proba = model.predict_proba(features)
+        levels = model.classes_[np.argmax(proba, axis=1)].astype(np.int64)
+        confidences = np.max(proba, axis=1)
+
+        logger.info(f"Compiled priority model into {cells} cells")
+        return cls(encoder, levels, confidences)
+
+    def cell_index(self, report: Dict) -> int:
+        """
+        Table cell of a report
+
+        Raises:
+            KeyError: If the report lacks one of the feature fields
+        """
+        index = 0
+        for (field, lookup), stride in zip(self.slot_lookups, self.strides):
+            index += lookup.get(report[field], 0) * stride
+        return index
+
+    def predict(self, report: Dict) -> Tuple[int, float]:
+        """
+        Predict one report
+
+        Returns:
+            Tuple of (priority level, confidence)
+        """
+        cell = self.cell_index(report)
+        return int(self.levels[cell]), float(self.confidences[cell])
+
+    def predict_batch(self, reports: Sequence[Dict]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Predict many reports with one gather per table
+
+        Returns:
+            Tuple of (levels, confidences, valid mask). Malformed reports are
+            flagged False in the mask and their entries are unspecified.
+        """
+        cells = np.zeros(len(reports), dtype=np.int64)
+        valid = np.ones(len(reports), dtype=bool)
+        invalid: List[int] = []
+
+        for i, report in enumerate(reports):
+            try:
+                cells[i] = self.cell_index(report)
+            except (KeyError, TypeError, AttributeError):
+                invalid.append(i)
+
+        valid[invalid] = False
+        return self.levels[cells], self.confidences[cells], valid
@@ -0,0 +1,127 @@
+"""
+Precompiled one-hot encoder for priority prediction
+Replaces the per-request pandas get_dummies pipeline with direct index lookups
+"""
+
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Categorical report fields the model is trained on, in training order
+FEATURE_FIELDS = (
+    'Problem_Category',
+    'Reporter_Type',
+    'Location',
+    'Impact_Scope',
+    'Occurrence_Pattern'
+)
+
+
+class FeatureEncoder:
+    """
+    One-hot encoder compiled from the training feature columns
+
+    Produces exactly the rows the old ``pd.get_dummies`` + column alignment
+    path produced: a field whose value was not seen during training (or is
+    None) leaves its block of columns at zero, and a report that lacks one
+    of the fields raises KeyError.
+    """
+
+    def __init__(self, feature_columns: Sequence[str]):
+        """
+        Build the value -> column index tables
+
+        Args:
+            feature_columns: Column names saved at training time, e.g.
+                ``Location_Lab`` or ``Impact_Scope_Everyone affected``
+        """
+        self.feature_columns = list(feature_columns)
+        self.n_features = len(self.feature_columns)
+        self.field_columns: Dict[str, Dict[str, int]] = {field: {} for field in FEATURE_FIELDS}
+
+        for index, column in enumerate(self.feature_columns):
+            for field in FEATURE_FIELDS:
+                prefix = field + '_'
+                if column.startswith(prefix):
+                    self.field_columns[field][column[len(prefix):]] = index
+                    break
+
+        self._lookups = tuple((field, self.field_columns[field]) for field in FEATURE_FIELDS)
+
+    def column_indices(self, report: Dict) -> List[int]:
+        """
+        Indices of the columns set to 1 for a report
+
+        Args:
+            report: Report dictionary with the categorical fields
+
+        Returns:
+            List of active column indices (at most one per field)
+        """
+        indices = []
+        for field, lookup in self._lookups:
+            index = lookup.get(report[field])
+            if index is not None:
+                indices.append(index)
+        return indices
+
+    def encode(self, report: Dict, out: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Encode a single report into a (1, n_features) float32 row
+
+        Args:
+            report: Report dictionary with the categorical fields
+            out: Optional preallocated (1, n_features) float32 buffer to fill
+
+        Returns:
+            Encoded feature row ready for ``predict_proba``
+        """
+        return self.encode_indices(self.column_indices(report), out)
+
+    def encode_indices(self, indices: Sequence[int], out: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Build the (1, n_features) float32 row for precomputed ``column_indices``
+
+        Args:
+            indices: Active column indices of one report
+            out: Optional preallocated (1, n_features) float32 buffer to fill
+
+        Returns:
+            Encoded feature row ready for ``predict_proba``
+        """
+        if out is None:
+            out = np.zeros((1, self.n_features), dtype=np.float32)
+        else:
+            out.fill(0.0)
+        out[0, list(indices)] = 1.0
+        return out
+
+    def encode_batch(self, reports: Sequence[Dict]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Encode many reports into one (n_reports, n_features) float32 matrix
+
+        Args:
+            reports: Sequence of report dictionaries
+
+        Returns:
+            Tuple of (feature matrix, boolean mask of reports that could be
+            encoded). Rows of malformed reports - not a dict, or missing one
+            of the fields - are left at zero and flagged False in the mask.
+        """
+        count = len(reports)
+        features = np.zeros((count, self.n_features), dtype=np.float32)
+        valid = np.ones(count, dtype=bool)
+        rows: List[int] = []
+        cols: List[int] = []
+
+        for i, report in enumerate(reports):
+            try:
+                indices = self.column_indices(report)
+            except (KeyError, TypeError, AttributeError):
+                valid[i] = False
+                continue
+            rows.extend([i] * len(indices))
+            cols.extend(indices)
+
+        features[rows, cols] = 1.0
+        return features, valid
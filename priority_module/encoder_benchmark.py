@@ -0,0 +1,128 @@
+"""
+Encoder benchmark: pandas get_dummies path vs. precompiled FeatureEncoder
+Checks that both paths give byte-identical predictions and reports the speedup,
+then does the same for the compiled lookup-table model
+
+Usage (from the repository root, with a trained model in the model store):
+    python -m priority_module.encoder_benchmark --reports 2000
+"""
+
+import argparse
+import os
+import random
+import time
+import warnings
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from .compiled import CompiledPriorityModel
+from .encoder import FeatureEncoder, FEATURE_FIELDS
+from .store import ModelStore
+
+
+def legacy_features(report, feature_columns):
+    """The per-request pandas pipeline predict_priority used before FeatureEncoder"""
+    report_df = pd.DataFrame([report])
+    report_dummies = pd.get_dummies(report_df[list(FEATURE_FIELDS)])
+    for col in feature_columns:
+        if col not in report_dummies.columns:
+            report_dummies[col] = 0
+    return report_dummies[feature_columns]
+
+
+def random_reports(encoder, count, seed=0):
+    """Random reports drawn from the trained vocabulary, plus some unseen/None values"""
+    rng = random.Random(seed)
+    reports = []
+    for _ in range(count):
+        report = {}
+        for field in FEATURE_FIELDS:
+            choices = list(encoder.field_columns[field]) + ['Unseen value', None]
+            report[field] = rng.choice(choices)
+        reports.append(report)
+    return reports
+
+
+def time_per_call(fn, reports):
+    """Mean wall time per call in microseconds"""
+    start = time.perf_counter()
+    for report in reports:
+        fn(report)
+    return (time.perf_counter() - start) / len(reports) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--reports', type=int, default=2000, help='number of random reports')
+    parser.add_argument('--store', default=os.environ.get('PRIORITY_MODEL_DIR', 'models'),
+                        help='model store directory')
+    parser.add_argument('--version', default=None, help='model version (default: the served one)')
+    parser.add_argument('--model', default=None, help='legacy pickle instead of the store (needs --columns)')
+    parser.add_argument('--columns', default=None)
+    args = parser.parse_args()
+
+    if args.model:
+        model = joblib.load(args.model)
+        feature_columns = list(joblib.load(args.columns or 'feature_columns.pkl'))
+    else:
+        store = ModelStore(args.store)
+        version = args.version or store.current_version()
+        if version is None:
+            parser.error(f"No trained model in {args.store}; train one first or pass --model")
+        model, feature_columns, _ = store.load(version)
+        print(f"Model version {version}")
+
+    # The legacy path predicts on a DataFrame; store models are served on plain
+    # matrices, which is what the comparison is about
+    warnings.filterwarnings('ignore', message='X has feature names')
+    encoder = FeatureEncoder(feature_columns)
+    reports = random_reports(encoder, args.reports)
+
+    # Correctness: identical feature rows and identical probabilities
+    mismatches = 0
+    for report in reports:
+        old_row = legacy_features(report, feature_columns).to_numpy(dtype=np.float32)
+        new_row = encoder.encode(report)
+        if old_row.tobytes() != new_row.tobytes():
+            mismatches += 1
+            continue
+        old_proba = model.predict_proba(legacy_features(report, feature_columns))
+        new_proba = model.predict_proba(new_row)
+        if old_proba.tobytes() != new_proba.tobytes():
+            mismatches += 1
+    print(f"Checked {len(reports)} reports: {mismatches} mismatches")
+
+    # Encoding cost alone
+    legacy_us = time_per_call(lambda r: legacy_features(r, feature_columns), reports)
+    encoder_us = time_per_call(encoder.encode, reports)
+    print(f"Encode   pandas: {legacy_us:9.1f} us/report")
+    print(f"Encode  encoder: {encoder_us:9.1f} us/report  ({legacy_us / encoder_us:.0f}x faster)")
+
+    # End to end, including the model call
+    sample = reports[:min(len(reports), 200)]
+    legacy_total = time_per_call(lambda r: model.predict_proba(legacy_features(r, feature_columns)), sample)
+    encoder_total = time_per_call(lambda r: model.predict_proba(encoder.encode(r)), sample)
+    print(f"Predict  pandas: {legacy_total:9.1f} us/report")
+    print(f"Predict encoder: {encoder_total:9.1f} us/report  ({legacy_total / encoder_total:.1f}x faster)")
+
+    # Compiled lookup table: same answers as the forest, one index per report
+    compile_start = time.perf_counter()
+    compiled = CompiledPriorityModel.from_forest(model, encoder)
+    print(f"Compiled {compiled.cells} cells in {(time.perf_counter() - compile_start) * 1000:.0f} ms")
+
+    mismatches = 0
+    for report in sample:
+        proba = model.predict_proba(encoder.encode(report))
+        level = int(model.classes_[np.argmax(proba[0])])
+        if (level, float(np.max(proba))) != compiled.predict(report):
+            mismatches += 1
+    print(f"Checked {len(sample)} reports against the compiled table: {mismatches} mismatches")
+
+    compiled_us = time_per_call(compiled.predict, reports)
+    print(f"Predict compiled: {compiled_us:8.1f} us/report  ({encoder_total / compiled_us:.0f}x faster than forest)")
+
+
+if __name__ == '__main__':
+    main()
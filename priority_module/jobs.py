@@ -0,0 +1,345 @@
+"""
+Background training jobs for the priority service
+Runs model training off the request thread, one job at a time
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows: only single-process servers (waitress, app.run)
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# Training callables receive a progress callback: progress(stage, fraction)
+ProgressCallback = Callable[[str, float], None]
+
+
+@dataclass
+class TrainingJob:
+    """
+    State of one training job
+
+    Only the worker thread mutates a job; request threads just read it.
+    """
+    source: str
+    id: str = field(default_factory=lambda: uuid.uuid4().hex)
+    status: str = 'queued'  # 'queued', 'running', 'succeeded', 'failed'
+    stage: str = 'queued'
+    progress: float = 0.0
+    metrics: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+
+    @property
+    def duration_seconds(self) -> Optional[float]:
+        """Run time so far (or in total once finished)"""
+        if self.started_at is None:
+            return None
+        end = self.finished_at if self.finished_at is not None else time.time()
+        return end - self.started_at
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to dictionary for API responses"""
+        def iso(timestamp):
+            return datetime.fromtimestamp(timestamp).isoformat() if timestamp else None
+
+        return {
+            'job_id': self.id,
+            'source': self.source,
+            'status': self.status,
+            'stage': self.stage,
+            'progress': round(self.progress, 3),
+            'metrics': self.metrics,
+            'error': self.error,
+            'created_at': iso(self.created_at),
+            'started_at': iso(self.started_at),
+            'finished_at': iso(self.finished_at),
+            'duration_seconds': self.duration_seconds
+        }
+
+
+class TrainingJobConflict(RuntimeError):
+    """Raised when a job is submitted while another one is still queued or running"""
+
+    def __init__(self, active_job: Dict[str, Any]):
+        super().__init__(f"Training job {active_job.get('job_id')} is already {active_job.get('status')}")
+        self.active_job = active_job
+
+
+class TrainingJobManager:
+    """
+    Single-worker queue for model training
+
+    ``submit`` returns immediately with the job record; the training callable
+    runs on a dedicated worker thread. A second submission while a job is
+    still active is rejected rather than queued behind it.
+
+    With a ``state_dir`` the job records are also written to disk and a file
+    lock guards the "one job at a time" rule, so several server processes
+    share one view: any worker can answer a status poll and a job started in
+    one worker blocks submissions in all of them.
+
+    A record left 'queued' or 'running' by a process that died mid-job (e.g.
+    a gunicorn worker killed on timeout) is marked failed once no process
+    holds the training lock, so status polls do not wait on it forever.
+    """
+
+    LOCK_FILE = 'active.lock'
+    ACTIVE_STATUSES = ('queued', 'running')
+
+    def __init__(self, max_history: int = 50, state_dir: Optional[str] = None,
+                 on_finish: Optional[Callable[[TrainingJob], None]] = None):
+        """
+        Initialize the job manager
+
+        Args:
+            max_history: Number of finished jobs kept for status lookups
+            state_dir: Directory shared by all server processes for job
+                records, or None to keep them in memory only
+            on_finish: Called with each job once it has succeeded or failed
+        """
+        self.max_history = max_history
+        self.state_dir = state_dir
+        self.on_finish = on_finish
+        if state_dir:
+            os.makedirs(state_dir, exist_ok=True)
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='priority-training')
+        self._lock = threading.Lock()
+        self._jobs: 'OrderedDict[str, TrainingJob]' = OrderedDict()
+        self._active: Optional[TrainingJob] = None
+        self._fail_orphaned_jobs()
+
+    def submit(self, train_fn: Callable[[ProgressCallback], Optional[Dict[str, Any]]],
+               source: str) -> TrainingJob:
+        """
+        Queue a training run
+
+        Args:
+            train_fn: Training callable taking a progress callback and returning
+                a metrics dictionary, or None when training failed
+            source: Label of the training data ('real' or 'synthetic')
+
+        Returns:
+            The queued job
+
+        Raises:
+            TrainingJobConflict: If another job is still queued or running
+        """
+        with self._lock:
+            if self._active is not None:
+                raise TrainingJobConflict(self._active.to_dict())
+
+            job = TrainingJob(source=source)
+            process_lock = self._acquire_process_lock(job)
+            self._active = job
+            self._jobs[job.id] = job
+            while len(self._jobs) > self.max_history:
+                self._jobs.popitem(last=False)
+
+        self._save(job)
+        self._prune_saved()
+        self._executor.submit(self._run, job, train_fn, process_lock)
+        logger.info(f"Training job {job.id} queued ({source} data)")
+        return job
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up a job by id
+
+        Returns:
+            The job as an API dictionary, or None if it is unknown (or was
+            already dropped from the history)
+        """
+        job = self._jobs.get(job_id)
+        if job is not None:
+            return job.to_dict()
+        record = self._load_saved(job_id)
+        if record is not None and record.get('status') in self.ACTIVE_STATUSES:
+            record = self._fail_if_orphaned(record)
+        return record
+
+    @property
+    def active(self) -> Optional[TrainingJob]:
+        """Job currently queued or running, if any"""
+        return self._active
+
+    def _run(self, job: TrainingJob,
+             train_fn: Callable[[ProgressCallback], Optional[Dict[str, Any]]],
+             process_lock) -> None:
+        """Worker-thread body: run the training callable and record the outcome"""
+        def report_progress(stage: str, fraction: float) -> None:
+            job.stage = stage
+            job.progress = fraction
+            self._save(job)
+
+        job.status = 'running'
+        job.started_at = time.time()
+        self._save(job)
+        try:
+            metrics = train_fn(report_progress)
+            if metrics is None:
+                job.status = 'failed'
+                job.error = 'Model training failed'
+            else:
+                job.metrics = metrics
+                job.stage = 'done'
+                job.progress = 1.0
+                job.status = 'succeeded'
+        except Exception as e:
+            logger.error(f"Training job {job.id} crashed: {e}")
+            job.status = 'failed'
+            job.error = str(e)
+        finally:
+            job.finished_at = time.time()
+            self._save(job)
+            with self._lock:
+                self._active = None
+                if process_lock is not None:
+                    fcntl.flock(process_lock, fcntl.LOCK_UN)
+                    process_lock.close()
+            logger.info(f"Training job {job.id} {job.status} in {job.duration_seconds:.2f}s")
+            if self.on_finish is not None:
+                try:
+                    self.on_finish(job)
+                except Exception as e:
+                    logger.warning(f"Training job {job.id} finish hook failed: {e}")
+
+    def _acquire_process_lock(self, job: TrainingJob):
+        """
+        Take the cross-process training lock for a new job
+
+        Returns:
+            Open lock file to release when the job ends, or None when jobs are
+            not shared between processes
+
+        Raises:
+            TrainingJobConflict: If a job is active in another process
+        """
+        if not self.state_dir or fcntl is None:
+            return None
+
+        handle = open(os.path.join(self.state_dir, self.LOCK_FILE), 'a+')
+        try:
+            fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            handle.seek(0)
+            active_id = handle.read().strip()
+            handle.close()
+            active = self._load_saved(active_id) if active_id else None
+            raise TrainingJobConflict(active or {'job_id': active_id or None, 'status': 'running'})
+
+        handle.seek(0)
+        handle.truncate()
+        handle.write(job.id)
+        handle.flush()
+        return handle
+
+    def _owner_alive(self, job_id: str) -> bool:
+        """Whether some live process (this one included) is running a job"""
+        active = self._active
+        if active is not None and active.id == job_id:
+            return True
+        if fcntl is None:
+            # No cross-process jobs: a record this process does not own is left
+            # over from an earlier run
+            return False
+
+        handle = open(os.path.join(self.state_dir, self.LOCK_FILE), 'a+')
+        try:
+            try:
+                fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                # Held by a live process: it owns the job named in the lock file
+                handle.seek(0)
+                return handle.read().strip() == job_id
+            fcntl.flock(handle, fcntl.LOCK_UN)
+            return False
+        finally:
+            handle.close()
+
+    def _fail_if_orphaned(self, record: Dict[str, Any]) -> Dict[str, Any]:
+        """Mark a saved 'queued'/'running' record failed if no process owns it"""
+        with self._lock:
+            if self._owner_alive(record['job_id']):
+                return record
+            # The job may have finished (and released the lock) since the
+            # record was read
+            record = self._load_saved(record['job_id']) or record
+            if record.get('status') not in self.ACTIVE_STATUSES:
+                return record
+            record = dict(record, status='failed', error='Training was interrupted (server process exited)',
+                          finished_at=datetime.now().isoformat())
+            self._write_record(record['job_id'], record)
+        logger.warning(f"Training job {record['job_id']} was orphaned, marked as failed")
+        return record
+
+    def _fail_orphaned_jobs(self) -> None:
+        """Fail every saved 'queued'/'running' record no live process owns"""
+        if not self.state_dir:
+            return
+        try:
+            job_ids = [entry.name[:-len('.json')] for entry in os.scandir(self.state_dir)
+                       if entry.name.endswith('.json')]
+        except OSError as e:
+            logger.warning(f"Could not scan training job records: {e}")
+            return
+        for job_id in job_ids:
+            record = self._load_saved(job_id)
+            if record is not None and record.get('status') in self.ACTIVE_STATUSES:
+                self._fail_if_orphaned(record)
+
+    def _job_path(self, job_id: str) -> str:
+        """Path of a job record inside ``state_dir``"""
+        return os.path.join(self.state_dir, f"{job_id}.json")
+
+    def _save(self, job: TrainingJob) -> None:
+        """Write the job record for other processes (atomic replace)"""
+        if not self.state_dir:
+            return
+        self._write_record(job.id, job.to_dict())
+
+    def _write_record(self, job_id: str, record: Dict[str, Any]) -> None:
+        """Atomically replace a job record in ``state_dir``"""
+        path = self._job_path(job_id)
+        try:
+            with open(path + '.tmp', 'w') as f:
+                json.dump(record, f)
+            os.replace(path + '.tmp', path)
+        except OSError as e:
+            logger.warning(f"Could not save training job {job_id}: {e}")
+
+    def _load_saved(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Read a job record written by any process"""
+        if not self.state_dir or not job_id.isalnum():
+            return None
+        try:
+            with open(self._job_path(job_id)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _prune_saved(self) -> None:
+        """Keep only the newest ``max_history`` job records on disk"""
+        if not self.state_dir:
+            return
+        try:
+            paths = [entry.path for entry in os.scandir(self.state_dir) if entry.name.endswith('.json')]
+            paths.sort(key=os.path.getmtime)
+            for path in paths[:-self.max_history]:
+                os.remove(path)
+        except OSError as e:
+            logger.warning(f"Could not prune training job records: {e}")
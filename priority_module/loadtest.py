@@ -0,0 +1,149 @@
+"""
+Load-test harness for the priority prediction service
+Sends /predict requests from many concurrent keep-alive connections and reports
+latency percentiles and throughput
+
+Usage (against a running server):
+    python -m priority_module.loadtest --url http://127.0.0.1:5000 --concurrency 32 --requests 5000
+"""
+
+import argparse
+import http.client
+import json
+import random
+import threading
+import time
+from typing import Dict, List
+from urllib.parse import urlsplit
+
+from .scoring import CATEGORY_WEIGHTS, IMPACT_WEIGHTS, OCCURRENCE_WEIGHTS
+from .synthetic import LOCATIONS, REPORTER_TYPES
+
+
+def random_reports(count: int, seed: int = 0) -> List[Dict]:
+    """Random /predict payloads drawn from the synthetic training vocabulary"""
+    rng = random.Random(seed)
+    return [
+        {
+            'Problem_Category': rng.choice(list(CATEGORY_WEIGHTS)),
+            'Reporter_Type': rng.choice(REPORTER_TYPES),
+            'Location': rng.choice(LOCATIONS),
+            'Impact_Scope': rng.choice(list(IMPACT_WEIGHTS)),
+            'Occurrence_Pattern': rng.choice(list(OCCURRENCE_WEIGHTS))
+        }
+        for _ in range(count)
+    ]
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of an ascending list"""
+    if not sorted_values:
+        return 0.0
+    rank = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values))) - 1))
+    return sorted_values[rank]
+
+
+def run_client(url, path: str, bodies: List[bytes], count: int,
+               latencies: List[float], errors: List[int], start: threading.Event) -> None:
+    """One client thread: ``count`` sequential requests over a keep-alive connection"""
+    connection_class = http.client.HTTPSConnection if url.scheme == 'https' else http.client.HTTPConnection
+    conn = connection_class(url.hostname, url.port, timeout=30)
+    headers = {'Content-Type': 'application/json'}
+    start.wait()
+
+    for i in range(count):
+        body = bodies[i % len(bodies)]
+        sent = time.perf_counter()
+        try:
+            conn.request('POST', path, body=body, headers=headers)
+            response = conn.getresponse()
+            response.read()
+            if response.status != 200:
+                errors.append(response.status)
+        except (OSError, http.client.HTTPException):
+            errors.append(0)
+            conn.close()
+            conn = connection_class(url.hostname, url.port, timeout=30)
+        latencies.append(time.perf_counter() - sent)
+
+    conn.close()
+
+
+def run(base_url: str, concurrency: int, requests: int, warmup: int = 50) -> Dict:
+    """
+    Run the load test
+
+    Args:
+        base_url: Server root, e.g. ``http://127.0.0.1:5000``
+        concurrency: Number of concurrent client connections
+        requests: Total number of measured requests
+        warmup: Requests sent (and discarded) before measuring
+
+    Returns:
+        Dictionary of latency percentiles (ms), throughput and error count
+    """
+    url = urlsplit(base_url)
+    path = url.path.rstrip('/') + '/predict'
+    bodies = [json.dumps(report).encode() for report in random_reports(1000)]
+
+    if warmup:
+        warm_latencies: List[float] = []
+        ready = threading.Event()
+        ready.set()
+        run_client(url, path, bodies, warmup, warm_latencies, [], ready)
+
+    latencies: List[float] = []
+    errors: List[int] = []
+    start = threading.Event()
+    per_client = [requests // concurrency + (1 if i < requests % concurrency else 0)
+                  for i in range(concurrency)]
+    threads = [
+        threading.Thread(target=run_client, args=(url, path, bodies, count, latencies, errors, start))
+        for count in per_client if count
+    ]
+    for thread in threads:
+        thread.start()
+
+    began = time.perf_counter()
+    start.set()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - began
+
+    ordered = sorted(latencies)
+    return {
+        'requests': len(latencies),
+        'concurrency': concurrency,
+        'errors': len(errors),
+        'seconds': elapsed,
+        'throughput_rps': len(latencies) / elapsed if elapsed else 0.0,
+        'p50_ms': percentile(ordered, 0.50) * 1000,
+        'p90_ms': percentile(ordered, 0.90) * 1000,
+        'p99_ms': percentile(ordered, 0.99) * 1000,
+        'max_ms': (ordered[-1] if ordered else 0.0) * 1000
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--url', default='http://127.0.0.1:5000', help='server root URL')
+    parser.add_argument('--concurrency', type=int, default=16, help='concurrent connections')
+    parser.add_argument('--requests', type=int, default=2000, help='measured requests in total')
+    parser.add_argument('--warmup', type=int, default=50, help='unmeasured warm-up requests')
+    parser.add_argument('--json', action='store_true', help='print the results as JSON')
+    args = parser.parse_args()
+
+    results = run(args.url, args.concurrency, args.requests, args.warmup)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{results['requests']} requests, {results['concurrency']} connections, "
+          f"{results['errors']} errors in {results['seconds']:.2f}s")
+    print(f"Throughput: {results['throughput_rps']:.0f} req/s")
+    print(f"Latency p50 {results['p50_ms']:.2f} ms | p90 {results['p90_ms']:.2f} ms | "
+          f"p99 {results['p99_ms']:.2f} ms | max {results['max_ms']:.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,147 @@
+"""
+Prometheus metrics for the priority service
+Request latency, model inference time, prediction counts, cache effectiveness
+and training job durations, exported in the Prometheus text format
+
+prometheus_client is optional: without it every recording call is a no-op and
+``render`` reports that metrics are unavailable. Under gunicorn, set
+PROMETHEUS_MULTIPROC_DIR so all worker processes are aggregated into one
+scrape (see gunicorn.conf.py).
+"""
+
+import logging
+import os
+from typing import Iterable, Optional, Tuple
+
+import numpy as np
+
+from .scoring import PRIORITY_LEVELS
+
+try:
+    from prometheus_client import (
+        CONTENT_TYPE_LATEST,
+        CollectorRegistry,
+        Counter,
+        Histogram,
+        generate_latest,
+        multiprocess
+    )
+    PROMETHEUS_AVAILABLE = True
+except ImportError:
+    PROMETHEUS_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# Request latencies span cached single predictions to large batches
+REQUEST_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# A compiled or cached prediction takes microseconds, a forest call milliseconds
+INFERENCE_BUCKETS = (0.00001, 0.00005, 0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01,
+                     0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0)
+
+TRAINING_BUCKETS = (1, 5, 10, 30, 60, 120, 300, 600, 1800, 3600)
+
+
+class PriorityMetrics:
+    """Recording helpers around the service's Prometheus metrics"""
+
+    def __init__(self):
+        """Register the metrics (no-op when prometheus_client is missing)"""
+        self.enabled = PROMETHEUS_AVAILABLE
+        if not self.enabled:
+            logger.info("prometheus_client not installed, /metrics disabled")
+            return
+
+        self.request_duration = Histogram(
+            'priority_http_request_duration_seconds',
+            'HTTP request latency by endpoint',
+            ['endpoint', 'method', 'status'],
+            buckets=REQUEST_BUCKETS
+        )
+        self.inference_duration = Histogram(
+            'priority_inference_duration_seconds',
+            'Time spent computing predictions (excluding HTTP and JSON handling)',
+            ['mode', 'kind'],
+            buckets=INFERENCE_BUCKETS
+        )
+        self.predictions = Counter(
+            'priority_predictions_total',
+            'Predictions served by priority level',
+            ['level']
+        )
+        self.cache_lookups = Counter(
+            'priority_prediction_cache_lookups_total',
+            'Prediction cache lookups by result',
+            ['result']
+        )
+        self.cache_evictions = Counter(
+            'priority_prediction_cache_evictions_total',
+            'Predictions evicted from the LRU cache'
+        )
+        self.training_duration = Histogram(
+            'priority_training_job_duration_seconds',
+            'Training job run time by outcome',
+            ['status'],
+            buckets=TRAINING_BUCKETS
+        )
+
+    def observe_request(self, endpoint: str, method: str, status: int, seconds: float) -> None:
+        """Record one HTTP request"""
+        if self.enabled:
+            self.request_duration.labels(endpoint, method, str(status)).observe(seconds)
+
+    def observe_inference(self, mode: str, kind: str, seconds: float, levels: Iterable[int]) -> None:
+        """
+        Record one prediction call
+
+        Args:
+            mode: 'forest', 'compiled', 'rules' or 'cache'
+            kind: 'single' or 'batch'
+            seconds: Time spent predicting
+            levels: Predicted priority levels
+        """
+        if not self.enabled:
+            return
+        self.inference_duration.labels(mode, kind).observe(seconds)
+        counts = np.bincount(np.asarray(list(levels), dtype=np.int64), minlength=len(PRIORITY_LEVELS))
+        for level, count in enumerate(counts.tolist()):
+            if count and level in PRIORITY_LEVELS:
+                self.predictions.labels(PRIORITY_LEVELS[level]).inc(count)
+
+    def observe_cache(self, hit: bool, evicted: int = 0) -> None:
+        """Record a prediction cache lookup (and any evictions its insert caused)"""
+        if not self.enabled:
+            return
+        self.cache_lookups.labels('hit' if hit else 'miss').inc()
+        if evicted:
+            self.cache_evictions.inc(evicted)
+
+    def observe_training(self, status: str, seconds: Optional[float]) -> None:
+        """Record a finished training job"""
+        if self.enabled and seconds is not None:
+            self.training_duration.labels(status).observe(seconds)
+
+    def render(self) -> Tuple[bytes, str]:
+        """
+        Current metrics in the Prometheus text format
+
+        Returns:
+            Tuple of (body, content type)
+
+        Raises:
+            RuntimeError: If prometheus_client is not installed
+        """
+        if not self.enabled:
+            raise RuntimeError("Metrics need prometheus_client (pip install prometheus_client)")
+
+        if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+            registry = CollectorRegistry()
+            multiprocess.MultiProcessCollector(registry)
+            return generate_latest(registry), CONTENT_TYPE_LATEST
+        return generate_latest(), CONTENT_TYPE_LATEST
+
+
+def mark_process_dead(pid: int) -> None:
+    """Drop a dead worker's live metric files (gunicorn child_exit hook)"""
+    if PROMETHEUS_AVAILABLE and os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        multiprocess.mark_process_dead(pid)
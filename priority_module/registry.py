@@ -0,0 +1,185 @@
+"""
+In-process model registry for the priority service
+Loads the trained model once per process and hot-swaps it after retraining
+"""
+
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from .compiled import CompiledPriorityModel
+from .encoder import FeatureEncoder
+from .store import ModelStore
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class ModelSnapshot:
+    """
+    Immutable view of one loaded model version
+
+    Request handlers grab a snapshot once and use it for the whole request,
+    so a concurrent swap can never mix the model of one version with the
+    feature columns of another.
+    """
+    model: Any  # None when serving stored compiled tables
+    feature_columns: List[str]
+    encoder: FeatureEncoder
+    version: str
+    loaded_at: float
+    compiled: Optional[CompiledPriorityModel] = None
+
+
+class ModelRegistry:
+    """
+    Holds the currently served priority model
+
+    Readers access ``current`` without locking: publishing a new version is a
+    single attribute assignment, which is atomic in CPython. The lock only
+    serialises concurrent loaders (e.g. two retrains finishing together).
+
+    The served version is whatever the store's CURRENT pointer names. Under a
+    multi-process server only the worker that ran ``/train`` calls ``load``;
+    the others notice the moved pointer through ``refresh_if_stale``.
+    """
+
+    def __init__(self, store: ModelStore, compile_model: bool = False,
+                 check_interval: float = 2.0):
+        """
+        Initialize the registry (nothing is loaded until ``load`` is called)
+
+        Args:
+            store: Versioned model store to serve from
+            compile_model: Also compile each loaded forest into a lookup table
+            check_interval: Minimum seconds between CURRENT pointer checks
+        """
+        self.store = store
+        self.compile_model = compile_model
+        self.check_interval = check_interval
+        self._snapshot: Optional[ModelSnapshot] = None
+        self._load_lock = threading.Lock()
+        self._attempted_version: Optional[str] = None
+        self._next_check = 0.0
+
+    @property
+    def current(self) -> Optional[ModelSnapshot]:
+        """Currently served snapshot, or None when no model has been loaded"""
+        return self._snapshot
+
+    def load(self) -> Optional[ModelSnapshot]:
+        """
+        Load the store's current version and publish it
+
+        On failure the previously served snapshot (if any) stays in place.
+
+        Returns:
+            The newly published snapshot, or None if nothing could be loaded
+        """
+        with self._load_lock:
+            return self._load_locked(self.store.current_version())
+
+    def refresh_if_stale(self) -> Optional[ModelSnapshot]:
+        """
+        Reload the model if the store's CURRENT pointer moved since it was loaded
+
+        Cheap enough to call on every request: the pointer is read at most once
+        per ``check_interval`` and a reload already in progress is never waited
+        for - requests keep using the current snapshot meanwhile. A version
+        that failed to load is not retried until the pointer moves again.
+
+        Returns:
+            The newly published snapshot, or None if nothing was reloaded
+        """
+        now = time.monotonic()
+        if now < self._next_check:
+            return None
+        self._next_check = now + self.check_interval
+
+        version = self.store.current_version()
+        if version is None or version == self._attempted_version:
+            return None
+        if not self._load_lock.acquire(blocking=False):
+            return None
+        try:
+            # Another thread may have reloaded while we were checking
+            if version == self._attempted_version:
+                return None
+            logger.info(f"Model store now points at {version}, reloading")
+            return self._load_locked(version)
+        finally:
+            self._load_lock.release()
+
+    def _load_locked(self, version: Optional[str]) -> Optional[ModelSnapshot]:
+        """Body of ``load``; the caller holds ``_load_lock``"""
+        if version is None:
+            logger.info("No trained priority model found in the model store")
+            return None
+
+        self._attempted_version = version
+        compiled = None
+        if self.compile_model:
+            # Serve the stored tables when they exist: they are memory-mapped and
+            # shared by every server process, while an unpickled forest would be
+            # a private copy per process
+            try:
+                feature_columns = self.store.load_feature_columns(version)
+                encoder = FeatureEncoder(feature_columns)
+                compiled = self.store.load_compiled(version, encoder)
+            except Exception as e:
+                logger.warning(f"Could not load compiled tables of {version}: {e}")
+            if compiled is not None:
+                return self._publish(None, feature_columns, encoder, version, compiled)
+
+        try:
+            model, feature_columns, _ = self.store.load(version)
+        except Exception as e:
+            logger.error(f"Error loading priority model {version}: {e}")
+            return None
+
+        encoder = FeatureEncoder(feature_columns)
+        if self.compile_model:
+            compiled = CompiledPriorityModel.from_forest(model, encoder)
+            if compiled is not None:
+                # Share the tables with the other server processes
+                try:
+                    self.store.save_compiled(version, compiled)
+                    compiled = self.store.load_compiled(version, encoder) or compiled
+                except OSError as e:
+                    logger.warning(f"Could not store compiled tables of {version}: {e}")
+
+        return self._publish(model, feature_columns, encoder, version, compiled)
+
+    def _publish(self, model, feature_columns: List[str], encoder: FeatureEncoder,
+                 version: str, compiled: Optional[CompiledPriorityModel]) -> ModelSnapshot:
+        """Swap in a new snapshot"""
+        snapshot = ModelSnapshot(
+            model=model,
+            feature_columns=feature_columns,
+            encoder=encoder,
+            version=version,
+            loaded_at=time.time(),
+            compiled=compiled
+        )
+        self._snapshot = snapshot
+
+        logger.info(f"Priority model {snapshot.version} loaded")
+        return snapshot
+
+    def info(self) -> Dict[str, Any]:
+        """Describe the served model for health checks"""
+        snapshot = self._snapshot
+        if snapshot is None:
+            return {'loaded': False}
+
+        return {
+            'loaded': True,
+            'version': snapshot.version,
+            'loaded_at': datetime.fromtimestamp(snapshot.loaded_at).isoformat(),
+            'feature_count': len(snapshot.feature_columns),
+            'mode': 'compiled' if snapshot.compiled is not None else 'forest',
+            'compiled_cells': snapshot.compiled.cells if snapshot.compiled is not None else None
+        }
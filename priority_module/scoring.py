@@ -0,0 +1,127 @@
+"""
+Rule-based priority scoring
+Single home of the category/impact/occurrence weights and the priority
+thresholds, vectorized with NumPy so the same rules label synthetic data,
+label real reports for training and score reports when no model exists
+"""
+
+from typing import Dict, Iterable, Sequence, Tuple
+
+import numpy as np
+
+from .encoder import FEATURE_FIELDS
+
+# Priority levels
+PRIORITY_LEVELS = {
+    3: "Critical",
+    2: "High",
+    1: "Medium",
+    0: "Low"
+}
+
+# Define feature importance for each category
+CATEGORY_WEIGHTS = {
+    "Infrastructure": 2,
+    "IT/Technical": 2,
+    "Academic": 1,
+    "Administrative": 1,
+    "Safety/Security": 3,
+    "Maintenance": 2
+}
+
+IMPACT_WEIGHTS = {
+    "Single person affected": 1,
+    "Whole class affected": 2,
+    "Everyone affected": 3
+}
+
+OCCURRENCE_WEIGHTS = {
+    "First occurrence": 1,
+    "Recurring issue": 2,
+    "Daily": 3,
+    "Weekly": 2
+}
+
+# Lowest score of the Medium, High and Critical levels (below 3 is Low)
+PRIORITY_THRESHOLDS = np.array([3, 6, 12])
+
+# Confidence reported for rule-based predictions
+RULE_CONFIDENCE = 0.5
+
+
+class _WeightTable:
+    """Maps category values to weights through a NumPy array (unknown values weigh 1)"""
+
+    def __init__(self, weights: Dict[str, int]):
+        self.codes = {value: code for code, value in enumerate(weights, start=1)}
+        self.table = np.array([1] + list(weights.values()), dtype=np.int64)
+
+    def __call__(self, values: Iterable) -> np.ndarray:
+        codes = np.fromiter((self.codes.get(value, 0) for value in values), dtype=np.intp)
+        return self.table[codes]
+
+
+_category_weights = _WeightTable(CATEGORY_WEIGHTS)
+_impact_weights = _WeightTable(IMPACT_WEIGHTS)
+_occurrence_weights = _WeightTable(OCCURRENCE_WEIGHTS)
+
+
+def rule_scores(categories: Iterable, impacts: Iterable, occurrences: Iterable) -> np.ndarray:
+    """
+    Rule-based priority scores (category weight x impact weight x occurrence weight)
+
+    Args:
+        categories: Problem_Category values
+        impacts: Impact_Scope values
+        occurrences: Occurrence_Pattern values
+
+    Returns:
+        Integer score per report
+    """
+    return (_category_weights(categories) *
+            _impact_weights(impacts) *
+            _occurrence_weights(occurrences))
+
+
+def levels_from_scores(scores: np.ndarray) -> np.ndarray:
+    """Bin rule scores into priority levels 0-3 (>=12 Critical, >=6 High, >=3 Medium)"""
+    return np.digitize(scores, PRIORITY_THRESHOLDS)
+
+
+def rule_priority_levels(categories: Iterable, impacts: Iterable, occurrences: Iterable) -> np.ndarray:
+    """Rule-based priority level per report, from the three weighted fields"""
+    return levels_from_scores(rule_scores(categories, impacts, occurrences))
+
+
+def _is_scorable(report) -> bool:
+    """True for a dictionary whose categorical fields can all be looked up (are hashable)"""
+    if not isinstance(report, dict):
+        return False
+    try:
+        for field in FEATURE_FIELDS:
+            hash(report.get(field))
+    except TypeError:
+        return False
+    return True
+
+
+def score_reports(reports: Sequence[Dict]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Rule-based priority levels for report dictionaries
+
+    Args:
+        reports: Sequence of report dictionaries
+
+    Returns:
+        Tuple of (priority levels, boolean mask of scorable reports).
+        Entries for reports that are not dictionaries, or that hold an
+        unhashable categorical value (a list or dict), are unspecified.
+    """
+    valid = np.fromiter((_is_scorable(report) for report in reports), dtype=bool, count=len(reports))
+    rows = [report if ok else {} for report, ok in zip(reports, valid)]
+    levels = rule_priority_levels(
+        [row.get('Problem_Category', '') for row in rows],
+        [row.get('Impact_Scope', '') for row in rows],
+        [row.get('Occurrence_Pattern', '') for row in rows]
+    )
+    return levels, valid
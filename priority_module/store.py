@@ -0,0 +1,380 @@
+"""
+Versioned on-disk store for priority model artifacts
+Each trained model lives in its own directory, published with an atomic rename
+and selected through a CURRENT pointer, so a crash mid-save can never leave a
+torn model behind and older versions stay around for rollback
+
+Layout::
+
+    models/
+        CURRENT                      # name of the served version
+        20261017T101500-3f2a9c1d/
+            model.joblib
+            feature_columns.json
+            manifest.json            # checksum, size, metrics (written last)
+            compiled_levels.npy      # optional lookup tables (compiled mode, memory-mapped)
+            compiled_confidences.npy
+"""
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+import time
+import uuid
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+import joblib
+import numpy as np
+
+from .compiled import CompiledPriorityModel
+from .encoder import FeatureEncoder
+
+logger = logging.getLogger(__name__)
+
+MODEL_FILE = 'model.joblib'
+COLUMNS_FILE = 'feature_columns.json'
+MANIFEST_FILE = 'manifest.json'
+COMPILED_FILES = ('compiled_levels.npy', 'compiled_confidences.npy')
+POINTER_FILE = 'CURRENT'
+
+
+class ModelStoreError(RuntimeError):
+    """Raised when a model version is missing or fails its integrity check"""
+
+
+class ModelStore:
+    """
+    Directory of model versions with an atomically updated CURRENT pointer
+
+    Versions are named ``<UTC timestamp>-<checksum>`` so they sort by age.
+    Only the newest ``keep`` versions (plus whatever CURRENT points at) are
+    kept on disk.
+    """
+
+    def __init__(self, root: str = 'models', keep: int = 5, mmap: bool = True):
+        """
+        Initialize the store (the directory is created on first save)
+
+        Args:
+            root: Directory holding the version directories
+            keep: Number of versions kept for rollback
+            mmap: Memory-map the compiled lookup tables on load so server
+                processes share one physical copy of them. The forest itself
+                cannot be shared this way (see ``load``)
+        """
+        self.root = root
+        self.keep = max(1, keep)
+        self.mmap = mmap
+
+    def current_version(self) -> Optional[str]:
+        """Version CURRENT points at, or None for an empty store"""
+        try:
+            with open(os.path.join(self.root, POINTER_FILE)) as f:
+                version = f.read().strip()
+        except OSError:
+            return None
+        return version or None
+
+    def versions(self) -> List[str]:
+        """Published versions, oldest first"""
+        try:
+            entries = os.scandir(self.root)
+        except OSError:
+            return []
+        with entries:
+            return sorted(
+                entry.name for entry in entries
+                if entry.is_dir() and not entry.name.startswith('.')
+                and os.path.exists(os.path.join(entry.path, MANIFEST_FILE))
+            )
+
+    def manifest(self, version: str) -> Dict[str, Any]:
+        """
+        Metadata of one version
+
+        Raises:
+            ModelStoreError: If the version does not exist
+        """
+        try:
+            with open(os.path.join(self._version_dir(version), MANIFEST_FILE)) as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            raise ModelStoreError(f"Unknown model version {version}") from e
+
+    def load(self, version: str) -> Tuple[Any, List[str], Dict[str, Any]]:
+        """
+        Load a version's model and feature columns
+
+        The checksum in the manifest is verified before unpickling.
+
+        Returns:
+            Tuple of (model, feature columns, manifest)
+
+        Raises:
+            ModelStoreError: If the version is missing or its model file is damaged
+        """
+        manifest = self.manifest(version)
+        directory = self._version_dir(version)
+        model_path = os.path.join(directory, MODEL_FILE)
+
+        if _file_digest(model_path) != manifest.get('sha1'):
+            raise ModelStoreError(f"Model version {version} failed its checksum")
+
+        # sklearn copies tree node arrays into its own buffers when unpickling,
+        # so memory-mapping would not share the forest: every process that
+        # loads a version holds a private copy of it (about model_size_bytes)
+        model = joblib.load(model_path)
+        feature_columns = self.load_feature_columns(version)
+        _drop_feature_names(model, feature_columns)
+        return model, feature_columns, manifest
+
+    def load_feature_columns(self, version: str) -> List[str]:
+        """
+        A version's feature columns, without loading its model
+
+        Raises:
+            ModelStoreError: If the version is missing
+        """
+        try:
+            with open(os.path.join(self._version_dir(version), COLUMNS_FILE)) as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            raise ModelStoreError(f"Unknown model version {version}") from e
+
+    def load_compiled(self, version: str, encoder: FeatureEncoder) -> Optional[CompiledPriorityModel]:
+        """
+        Memory-map a version's compiled lookup tables
+
+        Returns:
+            Compiled model, or None if the tables were never saved (or do not
+            match the encoder)
+        """
+        directory = self._version_dir(version)
+        paths = [os.path.join(directory, name) for name in COMPILED_FILES]
+        if not all(os.path.exists(path) for path in paths):
+            return None
+
+        mmap_mode = 'r' if self.mmap else None
+        levels, confidences = (np.load(path, mmap_mode=mmap_mode) for path in paths)
+        compiled = CompiledPriorityModel(encoder, levels, confidences)
+        if compiled.cells != int(np.prod(compiled.shape)):
+            logger.warning(f"Compiled tables of model {version} do not match its encoder, ignoring them")
+            return None
+        return compiled
+
+    def save(self, model, feature_columns: List[str],
+             metrics: Optional[Dict[str, Any]] = None,
+             compiled: Optional[CompiledPriorityModel] = None,
+             created_at: Optional[float] = None) -> str:
+        """
+        Publish a new version and point CURRENT at it
+
+        Everything is written to a hidden temporary directory first and
+        becomes visible through a single rename.
+
+        Args:
+            model: Fitted classifier
+            feature_columns: Training feature columns, in model order
+            metrics: Training metrics stored in the manifest
+            compiled: Optional compiled lookup tables to store alongside
+            created_at: Timestamp used for the version name (default: now)
+
+        Returns:
+            The new version name
+        """
+        os.makedirs(self.root, exist_ok=True)
+        created_at = time.time() if created_at is None else created_at
+        tmp_dir = os.path.join(self.root, f".tmp-{uuid.uuid4().hex}")
+        os.makedirs(tmp_dir)
+
+        try:
+            model_path = os.path.join(tmp_dir, MODEL_FILE)
+            joblib.dump(model, model_path)
+            _fsync_file(model_path)
+            _write_json(os.path.join(tmp_dir, COLUMNS_FILE), list(feature_columns))
+            if compiled is not None:
+                self._write_compiled(tmp_dir, compiled)
+
+            sha1 = _file_digest(model_path)
+            version = f"{time.strftime('%Y%m%dT%H%M%S', time.gmtime(created_at))}-{sha1[:8]}"
+            _write_json(os.path.join(tmp_dir, MANIFEST_FILE), {
+                'version': version,
+                'created_at': datetime.fromtimestamp(created_at).isoformat(),
+                'sha1': sha1,
+                'model_size_bytes': os.path.getsize(model_path),
+                'feature_count': len(feature_columns),
+                'metrics': metrics
+            })
+
+            target = self._version_dir(version)
+            if os.path.exists(target):
+                # Same model saved twice within a second: already published
+                shutil.rmtree(tmp_dir)
+            else:
+                os.rename(tmp_dir, target)
+                _fsync_dir(self.root)
+        except Exception:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise
+
+        self.set_current(version)
+        self.prune()
+        logger.info(f"Published model version {version}")
+        return version
+
+    def save_compiled(self, version: str, compiled: CompiledPriorityModel) -> None:
+        """Add compiled lookup tables to an already published version"""
+        self._write_compiled(self._version_dir(version), compiled)
+
+    def set_current(self, version: str) -> None:
+        """
+        Atomically point CURRENT at a published version
+
+        Raises:
+            ModelStoreError: If the version does not exist
+        """
+        self.manifest(version)
+        pointer = os.path.join(self.root, POINTER_FILE)
+        tmp_path = f"{pointer}.{uuid.uuid4().hex}.tmp"
+        with open(tmp_path, 'w') as f:
+            f.write(version)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, pointer)
+        _fsync_dir(self.root)
+
+    def rollback(self, version: Optional[str] = None) -> str:
+        """
+        Serve an older version again
+
+        Args:
+            version: Version to serve (default: the one before CURRENT)
+
+        Returns:
+            The version CURRENT now points at
+
+        Raises:
+            ModelStoreError: If there is nothing to roll back to
+        """
+        if version is None:
+            versions = self.versions()
+            current = self.current_version()
+            older = [v for v in versions if current is None or v < current]
+            if not older:
+                raise ModelStoreError("No older model version to roll back to")
+            version = older[-1]
+
+        self.set_current(version)
+        logger.info(f"Rolled back to model version {version}")
+        return version
+
+    def prune(self) -> None:
+        """Delete all but the newest ``keep`` versions (never the current one)"""
+        current = self.current_version()
+        for version in self.versions()[:-self.keep]:
+            if version != current:
+                shutil.rmtree(self._version_dir(version), ignore_errors=True)
+
+    def import_legacy(self, model_path: str, columns_path: str) -> Optional[str]:
+        """
+        Publish the old single-file artifacts (priority_model.pkl and
+        feature_columns.pkl) as a version of an empty store
+
+        A damaged file (e.g. torn by a crash mid-write) is skipped with a
+        warning, leaving the store empty so the service falls back to
+        rule-based scoring instead of failing to start.
+
+        Returns:
+            The imported version, or None if the store already has one or
+            the files do not exist or cannot be read
+        """
+        if self.current_version() is not None:
+            return None
+        if not (os.path.exists(model_path) and os.path.exists(columns_path)):
+            return None
+
+        try:
+            model = joblib.load(model_path)
+            feature_columns = list(joblib.load(columns_path))
+        except Exception as e:
+            logger.warning(f"Could not read {model_path} / {columns_path}, not importing them: {e}")
+            return None
+        _drop_feature_names(model, feature_columns)
+        version = self.save(model, feature_columns, created_at=os.path.getmtime(model_path))
+        logger.info(f"Imported {model_path} into the model store as {version}")
+        return version
+
+    def _version_dir(self, version: str) -> str:
+        """Directory of a version (rejecting names that would escape the store)"""
+        if not version or os.path.basename(version) != version or version.startswith('.'):
+            raise ModelStoreError(f"Invalid model version {version!r}")
+        return os.path.join(self.root, version)
+
+    def _write_compiled(self, directory: str, compiled: CompiledPriorityModel) -> None:
+        """Write the lookup tables as .npy files (atomic replace each)"""
+        for name, table in zip(COMPILED_FILES, (compiled.levels, compiled.confidences)):
+            path = os.path.join(directory, name)
+            tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+            with open(tmp_path, 'wb') as f:
+                np.save(f, np.ascontiguousarray(table))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, path)
+
+
+def _drop_feature_names(model, feature_columns: List[str]) -> None:
+    """
+    Forget the DataFrame column names a model was fitted with
+
+    Models trained before the float32 encoder (priority_model.pkl) were fitted
+    on a DataFrame, and sklearn warns on every ``predict_proba`` with a plain
+    matrix. The encoder lays rows out in ``feature_columns`` order, so matching
+    names carry no information.
+    """
+    names = getattr(model, 'feature_names_in_', None)
+    if names is None:
+        return
+    if list(names) != list(feature_columns):
+        logger.warning("Model feature names differ from its saved feature columns, keeping them")
+        return
+    del model.feature_names_in_
+
+
+def _file_digest(path: str) -> str:
+    """SHA-1 of a file"""
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _write_json(path: str, data: Any) -> None:
+    """Write a JSON file and flush it to disk"""
+    with open(path, 'w') as f:
+        json.dump(data, f, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def _fsync_file(path: str) -> None:
+    """Flush a written file to disk"""
+    with open(path, 'rb') as f:
+        os.fsync(f.fileno())
+
+
+def _fsync_dir(path: str) -> None:
+    """Flush a directory entry change to disk (not supported on Windows)"""
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
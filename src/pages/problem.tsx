@@ -9,6 +9,7 @@ import { Badge } from '@/components/ui/badge';
 import { Tabs, TabsContent, TabsList, TabsTrigger } from '@/components/ui/tabs';
 import { Skeleton } from '@/components/ui/skeleton';
 import { useToast } from '@/hooks/use-toast';
+import { mlService } from '@/services/mlService';
 import {
   Dialog,
   DialogContent,
@@ -166,6 +167,13 @@ const ProblemDashboard: React.FC = () => {
         throw new Error(`Failed to train model: ${response.statusText}`);
       }
       
+      // Training runs as a background job on the ML service
+      const { job_id } = await response.json();
+      const trained = await mlService.waitForTrainingJob(job_id);
+      if (!trained) {
+        throw new Error('Model training failed');
+      }
+      
       toast({
         title: 'Success',
         description: 'Model trained successfully',
@@ -25,13 +25,42 @@ export const mlService = {
       const response = await fetch(`${ML_SERVICE_URL}/train?synthetic=${useSynthetic}`, {
         method: 'POST',
       });
-      return response.ok;
+      if (!response.ok) {
+        return false;
+      }
+      const data = await response.json();
+      return await mlService.waitForTrainingJob(data.job_id);
     } catch (error) {
       console.error('Model training failed:', error);
       return false;
     }
   },
 
+  // Poll a background training job until it finishes (or give up after timeoutMs)
+  waitForTrainingJob: async (
+    jobId: string,
+    intervalMs: number = 1000,
+    timeoutMs: number = 15 * 60 * 1000
+  ): Promise<boolean> => {
+    const deadline = Date.now() + timeoutMs;
+    while (Date.now() < deadline) {
+      const response = await fetch(`${ML_SERVICE_URL}/train/${jobId}`);
+      if (!response.ok) {
+        return false;
+      }
+      const data = await response.json();
+      if (data.job.status === 'succeeded') {
+        return true;
+      }
+      if (data.job.status === 'failed') {
+        return false;
+      }
+      await new Promise((resolve) => setTimeout(resolve, intervalMs));
+    }
+    console.error(`Training job ${jobId} did not finish within ${timeoutMs / 1000}s`);
+    return false;
+  },
+
   // Update priorities
   updatePriorities: async (): Promise<number> => {
     try {
@@ -0,0 +1,22 @@
+"""
+Production entry point for the priority prediction service
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+gunicorn.conf.py sets preload_app, so this module is imported once in the
+master process: the model is loaded (or trained) before the workers fork and
+every worker shares the same model pages copy-on-write. A model published
+later (retrain or rollback) is loaded by each worker into its own memory.
+"""
+
+import gc
+
+from app import app, model_registry, train_model_with_dataset
+
+if model_registry.current is None:
+    print("No existing model found. Training new model...")
+    train_model_with_dataset()
+
+# Move everything loaded so far into the permanent generation, so garbage
+# collection in the workers does not write to (and un-share) those pages
+gc.freeze()